@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+
+# Almacén de solo añadir para los lotes de scrapeo. Cada lote nuevo se parsea
+# con la ingesta (que ya quita las filas repetidas, igual que al preparar
+# airbnb.parquet) y se escribe como su propio directorio,
+# particionado por fecha de scrapeo, Mes y Destino:
+#
+#   almacen/fecha=2024-03-01/mes=Julio/destino=Galicia/parte.parquet
+#
+# Nunca se reescribe un lote ya existente. Al leer, para cada (Mes, Destino)
+# manda el lote más reciente que lo incluya: un scrapeo de un mes y destino es
+# una foto completa de la oferta. Así un lote nuevo solo afecta a sus pares
+# (Mes, Destino), y datos.py actualiza solo esas entradas de sus agregados e
+# índices.
+#
+# Un lote puede traer solo algunos pares, pero en cuanto el almacén tiene lotes
+# la app deja de leer airbnb.parquet. Por eso el primer lote que se añade va
+# precedido de un lote base (fecha=0000-01-01, siempre el más antiguo) con el
+# contenido de airbnb.parquet: los pares que no traiga ningún lote siguen
+# saliendo de ahí.
+#
+# Uso: python almacen.py airbnb_raw.csv [--fecha 2024-03-01] [--base airbnb.parquet]
+
+import argparse
+import datetime
+import os
+import re
+import shutil
+import zlib
+
+import pandas as pd
+
+import ingesta
+
+RUTA_ALMACEN = os.environ.get('AIRBNB_ALMACEN', 'almacen')
+RUTA_BASE = os.environ.get('AIRBNB_DATOS', ingesta.RUTA_DATOS)
+
+LOTE_BASE = 'fecha=0000-01-01'
+
+COLUMNAS = ['Alojamiento', 'precio_noche', 'Descuento', 'Valoración', 'Nº Reseñas']
+
+_PATRON_LOTE = re.compile(r'^fecha=\d{4}-\d{2}-\d{2}$')
+
+
+def lotes(ruta=RUTA_ALMACEN):
+    # Un lote aparece de golpe (se escribe en un temporal y se renombra), así
+    # que basta listar el primer nivel para saber si hay lotes nuevos
+    if not os.path.isdir(ruta):
+        return []
+    return sorted(nombre for nombre in os.listdir(ruta) if _PATRON_LOTE.match(nombre))
+
+
+def version_almacen(lotes_almacen):
+    return f'almacen-{len(lotes_almacen)}-{zlib.crc32(",".join(lotes_almacen).encode()):08x}'
+
+
+def _escribir_lote(airbnb, directorio):
+    temporal = f'{directorio}.{os.getpid()}.tmp'
+    # Un temporal con nuestro pid solo puede quedar de un lote que murió a medias
+    shutil.rmtree(temporal, ignore_errors=True)
+    for (mes, destino), grupo in airbnb.groupby(['Mes', 'Destino'], observed=True):
+        carpeta = os.path.join(temporal, f'mes={mes}', f'destino={destino}')
+        os.makedirs(carpeta)
+        grupo[COLUMNAS].to_parquet(os.path.join(carpeta, 'parte.parquet'), index=False)
+    os.rename(temporal, directorio)
+
+
+def _sembrar(ruta, ruta_base):
+    # El lote base es lo que la app mostraba antes de tener almacén
+    if not os.path.exists(ruta_base):
+        ingesta.preparar(ruta_datos=ruta_base)
+    _escribir_lote(pd.read_parquet(ruta_base), os.path.join(ruta, LOTE_BASE))
+
+
+def anadir_lote(ruta_raw, fecha=None, ruta=RUTA_ALMACEN, ruta_base=RUTA_BASE):
+    fecha = fecha or datetime.date.today().isoformat()
+    directorio = os.path.join(ruta, f'fecha={fecha}')
+    if os.path.exists(directorio):
+        raise FileExistsError(f'El lote {fecha} ya existe y el almacén es de solo añadir')
+
+    airbnb = ingesta.parsear(ingesta.leer_raw(ruta_raw))
+
+    if not lotes(ruta):
+        _sembrar(ruta, ruta_base)
+    _escribir_lote(airbnb, directorio)
+    return airbnb
+
+
+def particiones(lotes_almacen, ruta=RUTA_ALMACEN):
+    # {(Destino, Mes): fichero del lote más reciente que lo incluye}
+    vigentes = {}
+    for lote in sorted(lotes_almacen):
+        for carpeta_mes in os.listdir(os.path.join(ruta, lote)):
+            mes = carpeta_mes.split('=', 1)[1]
+            for carpeta_destino in os.listdir(os.path.join(ruta, lote, carpeta_mes)):
+                destino = carpeta_destino.split('=', 1)[1]
+                vigentes[(destino, mes)] = os.path.join(ruta, lote, carpeta_mes, carpeta_destino, 'parte.parquet')
+    return vigentes
+
+
+def leer(particiones_almacen):
+    trozos = []
+    for (destino, mes), fichero in particiones_almacen.items():
+        trozo = pd.read_parquet(fichero)
+        trozo['Mes'] = mes
+        trozo['Destino'] = destino
+        trozos.append(trozo)
+    if not trozos:
+        return ingesta.parsear(pd.DataFrame(columns=['mes', 'destino', 'nombre', 'precio_noche', 'rating']))
+
+    airbnb = pd.concat(trozos, ignore_index=True)
+    airbnb['Mes'] = pd.Categorical(airbnb['Mes'], categories=ingesta.MESES, ordered=True)
+    airbnb['Destino'] = pd.Categorical(airbnb['Destino'], categories=ingesta.CCAA)
+    return airbnb[['Mes', 'Destino'] + COLUMNAS]
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Añade un lote de scrapeo al almacén')
+    parser.add_argument('raw', help='CSV scrapeado (mismo formato que airbnb_raw.csv)')
+    parser.add_argument('--fecha', help='Fecha del scrapeo, AAAA-MM-DD (por defecto, hoy)')
+    parser.add_argument('--almacen', default=RUTA_ALMACEN)
+    parser.add_argument('--base', default=RUTA_BASE,
+                        help='Datos con los que se siembra un almacén vacío (por defecto, airbnb.parquet)')
+    args = parser.parse_args()
+
+    airbnb = anadir_lote(args.raw, args.fecha, args.almacen, args.base)
+    print(f'{len(airbnb)} alojamientos en {airbnb.groupby(["Mes", "Destino"], observed=True).ngroups} '
+          f'particiones (Mes, Destino) añadidos a {args.almacen}')
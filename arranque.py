@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+
+# Informe del coste de arranque en frío. Mide, cada cosa en un proceso limpio:
+#   - lo que cuesta importar cada dependencia pesada por separado
+#   - para cada página: importar streamlit, importar el módulo de la página y
+#     cargar sus datos (precargar()), y qué dependencias pesadas acaba cargando
+# y compara el total de cada página con un presupuesto en segundos.
+#
+# Uso: python arranque.py [--presupuesto 3.0] [--json]
+
+import argparse
+import importlib
+import json
+import logging
+import os
+import subprocess
+import sys
+import time
+
+DEPENDENCIAS = ['streamlit', 'numpy', 'pandas', 'pyarrow', 'plotly.express',
+                'matplotlib', 'geopandas', 'plotnine']
+
+PRESUPUESTO = float(os.environ.get('AIRBNB_PRESUPUESTO_ARRANQUE', 3.0))
+
+
+def _cronometrar(funcion, *args):
+    inicio = time.perf_counter()
+    funcion(*args)
+    return time.perf_counter() - inicio
+
+
+def medir_dependencia(nombre):
+    return {'dependencia': nombre, 'segundos': _cronometrar(importlib.import_module, nombre)}
+
+
+def medir_pagina(nombre):
+    etapas = {'streamlit': _cronometrar(importlib.import_module, 'streamlit')}
+    # Fuera de `streamlit run` las cachés avisan de que no hay runtime
+    logging.getLogger('streamlit').setLevel(logging.ERROR)
+
+    import paginas
+    etapas['modulo'] = _cronometrar(paginas.modulo, nombre)
+    etapas['datos'] = _cronometrar(paginas.modulo(nombre).precargar)
+    return {'pagina': nombre, 'etapas': etapas, 'total': sum(etapas.values()),
+            'dependencias': [dep for dep in DEPENDENCIAS if dep in sys.modules]}
+
+
+def _en_proceso_limpio(*argumentos):
+    salida = subprocess.run([sys.executable, os.path.abspath(__file__), *argumentos, '--json'],
+                            capture_output=True, text=True, check=True,
+                            cwd=os.path.dirname(os.path.abspath(__file__)))
+    return json.loads(salida.stdout.strip().splitlines()[-1])
+
+
+def informe():
+    import paginas
+    return {'dependencias': [_en_proceso_limpio('--dependencia', dep) for dep in DEPENDENCIAS],
+            'paginas': [_en_proceso_limpio('--pagina', pagina) for pagina in paginas.PAGINAS]}
+
+
+def imprimir(resultado, presupuesto):
+    print('Importación de dependencias (cada una en un proceso limpio):')
+    for dependencia in resultado['dependencias']:
+        print(f"  {dependencia['dependencia']:<16} {dependencia['segundos']:7.3f} s")
+
+    print(f'\nArranque en frío por página (presupuesto {presupuesto:.1f} s):')
+    print(f"  {'página':<24}{'streamlit':>10}{'módulo':>10}{'datos':>10}{'total':>10}  dependencias")
+    for pagina in resultado['paginas']:
+        etapas = pagina['etapas']
+        marca = '' if pagina['total'] <= presupuesto else '  << fuera de presupuesto'
+        print(f"  {pagina['pagina']:<24}{etapas['streamlit']:10.3f}{etapas['modulo']:10.3f}"
+              f"{etapas['datos']:10.3f}{pagina['total']:10.3f}  {', '.join(pagina['dependencias'])}{marca}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Informe del coste de arranque del dashboard')
+    parser.add_argument('--presupuesto', type=float, default=PRESUPUESTO)
+    parser.add_argument('--json', action='store_true')
+    parser.add_argument('--dependencia')
+    parser.add_argument('--pagina')
+    args = parser.parse_args()
+
+    if args.dependencia:
+        resultado = medir_dependencia(args.dependencia)
+    elif args.pagina:
+        resultado = medir_pagina(args.pagina)
+    else:
+        resultado = informe()
+        resultado['presupuesto'] = args.presupuesto
+
+    if args.json or args.dependencia or args.pagina:
+        print(json.dumps(resultado, ensure_ascii=False))
+    else:
+        imprimir(resultado, args.presupuesto)
+
+    if 'paginas' in resultado and any(pagina['total'] > args.presupuesto for pagina in resultado['paginas']):
+        sys.exit(1)
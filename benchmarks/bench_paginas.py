@@ -0,0 +1,344 @@
+# -*- coding: utf-8 -*-
+
+# Benchmark de las páginas del dashboard sobre datasets sintéticos con el mismo
+# esquema que airbnb.parquet (50k, 500k y 5M filas por defecto). Cada página se
+# ejecuta sin servidor, con un `st` simulado que devuelve los valores de los
+# widgets de cada escenario y mide el tamaño de lo que se enviaría al navegador.
+#
+# Por página y escenario se guarda: latencia en frío (primera llamada, con las
+# cachés vacías), p50/p95 de las siguientes, pico de memoria de la llamada en
+# frío (tracemalloc; incluye cargar los datos y construir el índice, el cubo o
+# las densidades si esa página es la primera que los pide, que es lo que crece
+# con las filas), el máximo RSS del proceso hasta ese escenario y bytes
+# renderizados. tracemalloc multiplica el tiempo del código de Plotly, así que
+# el pico se mide en un segundo proceso limpio que solo hace las llamadas en
+# frío, y las latencias en uno sin tracemalloc. Cada tamaño se mide en un proceso limpio. Los resultados
+# se escriben en benchmarks/resultados/<commit>.json y se comparan con los de
+# la ejecución anterior para ver regresiones entre commits.
+#
+# Por defecto la caché de figuras está desactivada (AIRBNB_CACHE_FIGURAS_MB=0):
+# si no, todas las repeticiones salvo la primera serían aciertos y el p50/p95
+# no mediría el render. Por lo mismo, en ese modo los mapas prerenderizados se
+# borran (de memoria y de disco) antes de cada repetición del Mapa. Con
+# --con-cache-figuras se miden justo los aciertos.
+#
+# Uso: python benchmarks/bench_paginas.py [--filas 50000 500000] [--repeticiones 20] [--con-cache-figuras]
+
+import argparse
+import glob
+import io
+import json
+import logging
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RUTA_RESULTADOS = os.path.join(RAIZ, 'benchmarks', 'resultados')
+FILAS = [50_000, 500_000, 5_000_000]
+
+sys.path.insert(0, RAIZ)
+
+import ingesta  # noqa: E402
+
+TODOS_MESES = list(ingesta.MESES)
+TODAS_CCAA = list(ingesta.CCAA)
+
+# Combinaciones de widgets por página: {escenario: {etiqueta del widget: valor}}
+ESCENARIOS = {
+    'Introducción': {
+        'defecto': {},
+    },
+    'Buscador': {
+        'andalucia_julio': {'Seleccione una Comunidad Autónoma': 'Andalucía', 'Seleccione un mes': 'Julio',
+                            'Seleccione un rango de precios': (200.0, 500.0)},
+        'madrid_todo_rango': {'Seleccione una Comunidad Autónoma': 'Comunidad de Madrid', 'Seleccione un mes': 'Enero',
+                              'Seleccione un rango de precios': (0.0, 1500.0)},
+        'rioja_sin_resultados': {'Seleccione una Comunidad Autónoma': 'La Rioja', 'Seleccione un mes': 'Febrero',
+                                 'Seleccione un rango de precios': (1400.0, 1450.0)},
+    },
+    'Comparador general': {
+        'defecto': {},
+    },
+    'Comparador particular': {
+        'un_mes': {'Seleccione los meses': ['Julio'], 'Mostrar gráficos por meses': True},
+        'todos_meses': {'Seleccione los meses': TODOS_MESES, 'Mostrar gráficos por meses': True},
+        'dos_ccaa': {'Seleccione un mes': 'Agosto', 'Seleccione las Comunidades Autónomas': ['Andalucía', 'Galicia'],
+                     'Mostrar gráficos por CCAA': True},
+        'todas_ccaa': {'Seleccione un mes': 'Agosto', 'Seleccione las Comunidades Autónomas': TODAS_CCAA,
+                       'Mostrar gráficos por CCAA': True},
+    },
+    'Serie temporal': {
+        'una_ccaa': {'Seleccione las Comunidades Autónomas': ['Andalucía'], 'Mostrar gráfico': True},
+        'todas_ccaa': {'Seleccione las Comunidades Autónomas': TODAS_CCAA, 'Mostrar gráfico': True},
+    },
+    'Mapa': {
+        'imagen': {'Seleccione un mes': 'Julio', 'Tipo de mapa': 'Imagen', 'Mostrar mapa para': True},
+        'interactivo': {'Seleccione un mes': 'Julio', 'Tipo de mapa': 'Interactivo', 'Mostrar mapa para': True},
+    },
+}
+
+
+def generar_airbnb(filas, semilla=0):
+    # Mismo esquema y tipos que produce la ingesta, con precios que dependen
+    # del destino y del mes para que los agregados no sean triviales
+    rng = np.random.default_rng(semilla)
+    destino = rng.integers(0, len(TODAS_CCAA), filas)
+    mes = rng.integers(0, len(TODOS_MESES), filas)
+    base = 120 + 8 * destino + 10 * np.sin(mes / 12 * 2 * np.pi)
+    precio = np.clip(np.round(rng.lognormal(np.log(base), 0.45)), 25, 1490).astype(np.float32)
+    inicial = np.where(rng.random(filas) < 0.07, np.round(precio * rng.uniform(1.05, 1.5, filas)), np.nan)
+    resenas = rng.negative_binomial(1, 0.025, filas).astype(np.int32)
+    valoracion = np.where(resenas > 0, np.round(np.clip(5 - rng.gamma(1.2, 0.15, filas), 2.5, 5), 2), np.nan)
+    nombres = np.array([f'Alojamiento sintético {i}' for i in range(max(filas // 10, 1))], dtype=object)
+
+    return pd.DataFrame({
+        'Mes': pd.Categorical.from_codes(mes, categories=TODOS_MESES, ordered=True),
+        'Destino': pd.Categorical.from_codes(destino, categories=TODAS_CCAA),
+        'Alojamiento': nombres[rng.integers(0, len(nombres), filas)],
+        'precio_noche': precio,
+        'Descuento': np.nan_to_num(np.round(100 * (1 - precio / inicial))).astype(np.float32),
+        'Valoración': valoracion.astype(np.float32),
+        'Nº Reseñas': resenas,
+    })
+
+
+class _Contexto:
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+
+class StreamlitSimulado:
+    # Sustituye al módulo streamlit dentro de las páginas: los widgets devuelven
+    # el valor del escenario (o el suyo por defecto) y las salidas suman los
+    # bytes que se mandarían al navegador
+
+    def __init__(self, valores):
+        self.valores = valores
+        self.query_params = {}
+        self.bytes = 0
+        self.elementos = 0
+
+    def _salida(self, n_bytes):
+        self.bytes += n_bytes
+        self.elementos += 1
+
+    def _valor(self, etiqueta, defecto):
+        for clave, valor in self.valores.items():
+            if etiqueta == clave or etiqueta.startswith(clave):
+                return valor
+        return defecto
+
+    def header(self, cuerpo, *args, **kwargs):
+        self._salida(len(str(cuerpo).encode()))
+
+    write = caption = header
+
+    def image(self, imagen, *args, **kwargs):
+        self._salida(len(imagen) if isinstance(imagen, bytes) else os.path.getsize(imagen))
+
+    def dataframe(self, tabla, *args, **kwargs):
+        self._salida(len(tabla.to_json(orient='split')))
+
+    def plotly_chart(self, fig, *args, **kwargs):
+        # Las figuras que salen de la caché de figuras llegan ya como dict
+        self._salida(len(json.dumps(fig) if isinstance(fig, dict) else fig.to_json()))
+
+    def pyplot(self, fig, *args, **kwargs):
+        import matplotlib.pyplot as plt
+
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format='png')
+        plt.close(fig)
+        self._salida(len(buffer.getvalue()))
+
+    def columns(self, spec, *args, **kwargs):
+        return [_Contexto() for _ in range(spec if isinstance(spec, int) else len(spec))]
+
+    def selectbox(self, etiqueta, opciones, *args, **kwargs):
+        return self._valor(etiqueta, opciones[0])
+
+    radio = selectbox
+
+    def multiselect(self, etiqueta, opciones, *args, **kwargs):
+        return self._valor(etiqueta, [])
+
+    def slider(self, etiqueta, minimo, maximo, valor=None, *args, **kwargs):
+        return self._valor(etiqueta, valor)
+
+    def button(self, etiqueta, *args, **kwargs):
+        return self._valor(etiqueta, False)
+
+
+def ejecutar_pagina(pagina, valores):
+    import paginas
+
+    modulo = paginas.modulo(pagina)
+    simulado = StreamlitSimulado(valores)
+    modulo.st = simulado
+    inicio = time.perf_counter()
+    getattr(modulo, paginas.PAGINAS[pagina][1])()
+    return time.perf_counter() - inicio, simulado
+
+
+def _olvidar_mapas():
+    import mapas
+
+    mapas._mapas.clear()
+    shutil.rmtree(mapas.RUTA_MAPAS, ignore_errors=True)
+
+
+# Cachés propias de una página (fuera de la caché de figuras) que se vacían
+# antes de cada repetición cuando se mide sin caché de figuras
+OLVIDAR = {'Mapa': _olvidar_mapas}
+
+
+def medir_memoria(filas):
+    # Como medir_tamano, pero solo la llamada en frío de cada escenario
+    logging.getLogger('streamlit').setLevel(logging.ERROR)
+    resultados = []
+    for pagina, escenarios in ESCENARIOS.items():
+        for escenario, valores in escenarios.items():
+            tracemalloc.start()
+            ejecutar_pagina(pagina, valores)
+            pico = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            resultados.append({'filas': filas, 'pagina': pagina, 'escenario': escenario, 'pico_mb': pico / 2**20})
+    return resultados
+
+
+def medir_tamano(filas, repeticiones):
+    # Se ejecuta en un proceso limpio, con AIRBNB_DATOS, AIRBNB_CACHE y
+    # AIRBNB_ALMACEN apuntando al dataset sintético y a una caché vacía
+    import figuras
+
+    logging.getLogger('streamlit').setLevel(logging.ERROR)
+    resultados = []
+    for pagina, escenarios in ESCENARIOS.items():
+        olvidar = OLVIDAR.get(pagina) if not figuras.TAMANO_MAXIMO else None
+        for escenario, valores in escenarios.items():
+            frio, simulado = ejecutar_pagina(pagina, valores)
+            latencias = []
+            for _ in range(repeticiones):
+                if olvidar:
+                    olvidar()
+                latencias.append(ejecutar_pagina(pagina, valores)[0])
+
+            resultados.append({'filas': filas, 'pagina': pagina, 'escenario': escenario,
+                               'frio_ms': frio * 1000,
+                               'p50_ms': float(np.percentile(latencias, 50)) * 1000,
+                               'p95_ms': float(np.percentile(latencias, 95)) * 1000,
+                               # ru_maxrss va en KB en Linux
+                               'rss_max_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+                               'bytes': simulado.bytes, 'elementos': simulado.elementos})
+    return resultados
+
+
+def _en_proceso_limpio(filas, repeticiones, directorio, cache_figuras=False):
+    ruta_datos = os.path.join(directorio, f'airbnb_{filas}.parquet')
+    generar_airbnb(filas).to_parquet(ruta_datos, index=False)
+
+    def ejecutar(*argumentos, cache):
+        # Almacén vacío para que se lea el dataset sintético y no los lotes
+        # reales, y una caché vacía por proceso para que nada llegue hecho
+        entorno = dict(os.environ, AIRBNB_DATOS=ruta_datos, AIRBNB_CACHE=os.path.join(directorio, cache),
+                       AIRBNB_ALMACEN=os.path.join(directorio, 'sin_almacen'))
+        if not cache_figuras:
+            entorno['AIRBNB_CACHE_FIGURAS_MB'] = '0'
+        salida = subprocess.run([sys.executable, os.path.abspath(__file__), *argumentos],
+                                capture_output=True, text=True, check=True, cwd=RAIZ, env=entorno)
+        return json.loads(salida.stdout.strip().splitlines()[-1])
+
+    resultados = ejecutar('--medir', str(filas), '--repeticiones', str(repeticiones), cache=f'cache_{filas}')
+    picos = {(fila['pagina'], fila['escenario']): fila['pico_mb']
+             for fila in ejecutar('--medir-memoria', str(filas), cache=f'cache_{filas}_memoria')}
+    for fila in resultados:
+        fila['pico_mb'] = picos[(fila['pagina'], fila['escenario'])]
+    return resultados
+
+
+def _commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True, cwd=RAIZ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'sin-git'
+
+
+def _anterior(ruta_actual):
+    anteriores = [ruta for ruta in glob.glob(os.path.join(RUTA_RESULTADOS, '*.json'))
+                  if os.path.abspath(ruta) != os.path.abspath(ruta_actual)]
+    if not anteriores:
+        return None
+    with open(max(anteriores, key=os.path.getmtime), encoding='utf-8') as fichero:
+        return json.load(fichero)
+
+
+def imprimir(informe, anterior):
+    previos = {}
+    if anterior:
+        previos = {(fila['filas'], fila['pagina'], fila['escenario']): fila for fila in anterior['resultados']}
+        print(f"Comparando con {anterior['commit']} ({anterior['fecha']})")
+        if anterior.get('cache_figuras', False) != informe['cache_figuras']:
+            print('  (la ejecución anterior se hizo con la caché de figuras en el otro modo)')
+
+    print(f"{'filas':>9}  {'página':<22}{'escenario':<22}{'frío ms':>9}{'p50 ms':>9}{'p95 ms':>9}"
+          f"{'pico MB':>9}{'RSS MB':>9}{'KB':>9}  vs anterior")
+    for fila in informe['resultados']:
+        previo = previos.get((fila['filas'], fila['pagina'], fila['escenario']))
+        cambio = f"{fila['p50_ms'] / previo['p50_ms']:6.2f}x" if previo and previo['p50_ms'] else ''
+        print(f"{fila['filas']:>9}  {fila['pagina']:<22}{fila['escenario']:<22}{fila['frio_ms']:9.1f}"
+              f"{fila['p50_ms']:9.1f}{fila['p95_ms']:9.1f}{fila['pico_mb']:9.1f}"
+              f"{fila['rss_max_mb']:9.1f}{fila['bytes'] / 1024:9.1f}  {cambio}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark de las páginas del dashboard')
+    parser.add_argument('--filas', type=int, nargs='+', default=FILAS)
+    parser.add_argument('--repeticiones', type=int, default=20)
+    parser.add_argument('--con-cache-figuras', action='store_true',
+                        help='Mide con la caché de figuras activa (las repeticiones son aciertos)')
+    parser.add_argument('--salida', help='Fichero JSON de resultados (por defecto resultados/<commit>.json)')
+    parser.add_argument('--medir', type=int, help=argparse.SUPPRESS)
+    parser.add_argument('--medir-memoria', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.medir:
+        os.chdir(RAIZ)
+        print(json.dumps(medir_tamano(args.medir, args.repeticiones), ensure_ascii=False))
+        sys.exit(0)
+    if args.medir_memoria:
+        os.chdir(RAIZ)
+        print(json.dumps(medir_memoria(args.medir_memoria), ensure_ascii=False))
+        sys.exit(0)
+
+    with tempfile.TemporaryDirectory() as directorio:
+        resultados = []
+        for filas in args.filas:
+            resultados.extend(_en_proceso_limpio(filas, args.repeticiones, directorio, args.con_cache_figuras))
+
+    informe = {'commit': _commit(), 'fecha': time.strftime('%Y-%m-%d %H:%M:%S'),
+               'python': platform.python_version(), 'pandas': pd.__version__,
+               'repeticiones': args.repeticiones, 'cache_figuras': args.con_cache_figuras,
+               'resultados': resultados}
+    salida = args.salida or os.path.join(RUTA_RESULTADOS, f"{informe['commit']}.json")
+    anterior = _anterior(salida)
+    os.makedirs(os.path.dirname(os.path.abspath(salida)), exist_ok=True)
+    with open(salida, 'w', encoding='utf-8') as fichero:
+        json.dump(informe, fichero, ensure_ascii=False, indent=1)
+
+    imprimir(informe, anterior)
+    print(f'\nResultados en {salida}')
@@ -0,0 +1,166 @@
+# -*- coding: utf-8 -*-
+
+# Instantáneas del dataset preparado que varios procesos de Streamlit pueden
+# mapear en memoria (mmap) en lugar de leer y materializar cada uno su copia.
+# El primer proceso que ve una versión nueva de los datos la escribe en
+#
+#   cache/compartido/<versión>/
+#
+# y el resto solo la mapea: el sistema operativo comparte las mismas páginas
+# entre todos los procesos y un worker está listo en cuanto vuelve el mapeo.
+#
+# Cada columna es un .npy (los categóricos como sus códigos) que se carga con
+# np.load(mmap_mode='r'), y el DataFrame se monta sobre esos arrays sin copia.
+# Los nombres de los alojamientos van como diccionario en un fichero Arrow IPC,
+# también mapeado sin copia. Las filas se guardan en el orden del índice del
+# Buscador, así que sus tramos y arrays también son vistas sobre el mapeo. Las
+# tablas del cubo van en Parquet y las curvas de densidad como .npy; nada se
+# guarda como pickle, que ataría la instantánea a las clases de una versión
+# concreta del código.
+#
+# FORMATO forma parte del nombre del directorio: si cambia cómo se escribe una
+# instantánea, los procesos con el código nuevo no leen las del viejo.
+
+import json
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+import cubo
+import densidades
+import indice
+
+FORMATO = 2
+
+RUTA_COMPARTIDO = os.path.join(os.environ.get('AIRBNB_CACHE', 'cache'), 'compartido')
+
+ARRAYS_INDICE = ['inicios', 'fines', 'orden', 'precios']
+
+
+def _nombre(version):
+    return f'{version}-formato{FORMATO}'
+
+
+def ruta_instantanea(version):
+    return os.path.join(RUTA_COMPARTIDO, _nombre(version))
+
+
+def exportar(version, derivados):
+    destino = ruta_instantanea(version)
+    if os.path.exists(destino):
+        return destino
+    import pyarrow as pa
+
+    temporal = f'{destino}.{os.getpid()}.tmp'
+    # Un temporal con nuestro pid solo puede quedar de una exportación que murió
+    # a medias (en un contenedor el pid se repite en cada arranque)
+    shutil.rmtree(temporal, ignore_errors=True)
+    os.makedirs(temporal)
+    indice_buscador = derivados['indice']
+    ordenado = indice_buscador.ordenado
+    columnas = []
+    for posicion, columna in enumerate(ordenado.columns):
+        serie = ordenado[columna]
+        fichero = f'columna_{posicion}.npy'
+        if isinstance(serie.dtype, pd.CategoricalDtype):
+            np.save(os.path.join(temporal, fichero), serie.array.codes)
+            columnas.append({'nombre': columna, 'fichero': fichero, 'categorias': list(serie.cat.categories),
+                             'ordenado': bool(serie.cat.ordered)})
+        elif pd.api.types.is_numeric_dtype(serie.dtype):
+            np.save(os.path.join(temporal, fichero), serie.to_numpy())
+            columnas.append({'nombre': columna, 'fichero': fichero})
+        else:
+            # Texto: códigos en .npy (con el tipo que usará pandas, para no copiar)
+            # y el diccionario de valores únicos en Arrow IPC
+            categorico = pd.Categorical(serie)
+            np.save(os.path.join(temporal, fichero), categorico.codes)
+            diccionario = f'diccionario_{posicion}.arrow'
+            tabla = pa.table({'valor': pa.array(categorico.categories.astype(str), type=pa.string())})
+            with pa.OSFile(os.path.join(temporal, diccionario), 'wb') as salida:
+                with pa.ipc.new_file(salida, tabla.schema) as escritor:
+                    escritor.write_table(tabla)
+            columnas.append({'nombre': columna, 'fichero': fichero, 'diccionario': diccionario})
+
+    for nombre in ARRAYS_INDICE:
+        np.save(os.path.join(temporal, f'indice_{nombre}.npy'), getattr(indice_buscador, nombre))
+    for nombre in cubo.TABLAS:
+        getattr(derivados['cubo'], nombre).to_parquet(os.path.join(temporal, f'cubo_{nombre}.parquet'))
+    curvas = derivados['densidades']
+    np.save(os.path.join(temporal, 'densidades_por_mes.npy'), curvas.por_mes)
+    np.save(os.path.join(temporal, 'densidades_por_mes_destino.npy'), curvas.por_mes_destino)
+    with open(os.path.join(temporal, 'meta.json'), 'w', encoding='utf-8') as fichero:
+        json.dump({'version': version, 'formato': FORMATO, 'filas': len(ordenado), 'columnas': columnas,
+                   'densidades': {'meses': curvas.meses, 'destinos': curvas.destinos}},
+                  fichero, ensure_ascii=False)
+
+    try:
+        os.rename(temporal, destino)
+    except OSError:
+        # Otro proceso la ha escrito a la vez: nos quedamos con la suya
+        shutil.rmtree(temporal, ignore_errors=True)
+    _limpiar(version)
+    return destino
+
+
+def _vivo(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        # Existe, pero es de otro usuario
+        pass
+    return True
+
+
+def _limpiar(version):
+    # Las versiones viejas (de los datos o del formato) sobran. Un proceso que
+    # aún las tenga mapeadas no se ve afectado (en POSIX el fichero vive
+    # mientras siga mapeado). De los temporales solo se borran los de procesos
+    # que ya no existen: los demás son exportaciones en curso.
+    for nombre in os.listdir(RUTA_COMPARTIDO):
+        if nombre.endswith('.tmp'):
+            pid = nombre.rsplit('.', 2)[-2]
+            if not pid.isdigit() or _vivo(int(pid)):
+                continue
+        elif nombre == _nombre(version):
+            continue
+        shutil.rmtree(os.path.join(RUTA_COMPARTIDO, nombre), ignore_errors=True)
+
+
+def mapear(version):
+    # Devuelve (airbnb, derivados) sin leer los datos, o None si no hay instantánea
+    origen = ruta_instantanea(version)
+    if not os.path.exists(os.path.join(origen, 'meta.json')):
+        return None
+    import pyarrow as pa
+
+    with open(os.path.join(origen, 'meta.json'), encoding='utf-8') as fichero:
+        meta = json.load(fichero)
+
+    columnas = {}
+    for columna in meta['columnas']:
+        valores = np.load(os.path.join(origen, columna['fichero']), mmap_mode='r')
+        if 'categorias' in columna:
+            valores = pd.Categorical.from_codes(valores, categories=columna['categorias'],
+                                                ordered=columna['ordenado'])
+        elif 'diccionario' in columna:
+            lector = pa.ipc.open_file(pa.memory_map(os.path.join(origen, columna['diccionario'])))
+            diccionario = pd.Index(pd.arrays.ArrowStringArray(lector.read_all().column('valor')))
+            valores = pd.Categorical.from_codes(valores, categories=diccionario)
+        columnas[columna['nombre']] = pd.Series(valores, copy=False)
+    # Un bloque por columna: con copy=False pandas (>= 2, ver requirements.txt) no
+    # consolida las columnas numéricas en un único array, que sería una copia
+    airbnb = pd.DataFrame(columnas, copy=False)
+
+    arrays = {nombre: np.load(os.path.join(origen, f'indice_{nombre}.npy'), mmap_mode='r')
+              for nombre in ARRAYS_INDICE}
+    tablas = {nombre: pd.read_parquet(os.path.join(origen, f'cubo_{nombre}.parquet')) for nombre in cubo.TABLAS}
+    curvas = {nombre: np.load(os.path.join(origen, f'densidades_{nombre}.npy'), mmap_mode='r')
+              for nombre in ['por_mes', 'por_mes_destino']}
+    derivados = {'indice': indice.IndiceBuscador.desde_arrays(airbnb, **arrays),
+                 'cubo': cubo.CuboPrecios.desde_tablas(**tablas),
+                 'densidades': densidades.DensidadesPrecio.desde_arrays(**meta['densidades'], **curvas)}
+    return airbnb, derivados
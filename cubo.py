@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+
+# Cubo de agregados del precio por noche. Se calcula una sola vez por versión
+# del dataset y de él leen el Comparador general, la Serie temporal y el Mapa,
+# que antes hacían cada uno su propio groupby sobre todos los alojamientos.
+#
+#   celdas       -> estadísticos por (Destino, Mes)
+#   por_destino  -> roll-up por Destino (todos los meses)
+#   por_mes      -> roll-up por Mes (todos los destinos)
+#
+# Las medias de los roll-ups podrían salir de sum/count de las celdas, pero
+# las medianas y cuantiles no, así que los roll-ups se calculan sobre los datos.
+
+import pandas as pd
+
+CUANTILES = [0.1, 0.25, 0.75, 0.9]
+
+TABLAS = ['celdas', 'por_destino', 'por_mes']
+
+
+def _estadisticos(precios):
+    tabla = precios.agg(['count', 'sum', 'mean', 'median'])
+    cuantiles = precios.quantile(CUANTILES).unstack()
+    cuantiles.columns = [f'q{round(q * 100)}' for q in CUANTILES]
+    return tabla.join(cuantiles)
+
+
+def _reemplazar(tabla, nuevas):
+    return pd.concat([tabla.loc[~tabla.index.isin(nuevas.index)], nuevas]).sort_index()
+
+
+class CuboPrecios:
+
+    def __init__(self, airbnb):
+        precio = airbnb['precio_noche'].astype('float64')
+        destino, mes = airbnb['Destino'], airbnb['Mes']
+        self.celdas = _estadisticos(precio.groupby([destino, mes], observed=True))
+        self.por_destino = _estadisticos(precio.groupby(destino, observed=True))
+        self.por_mes = _estadisticos(precio.groupby(mes, observed=True)).sort_index()
+
+    @classmethod
+    def desde_tablas(cls, celdas, por_destino, por_mes):
+        # Para un cubo ya calculado (p. ej. leído de disco por compartido.py)
+        cubo = cls.__new__(cls)
+        cubo.celdas, cubo.por_destino, cubo.por_mes = celdas, por_destino, por_mes
+        return cubo
+
+    def actualizar(self, airbnb, filas, claves):
+        # Lote nuevo: se recalculan las celdas de los pares afectados y los roll-ups
+        # de sus destinos y meses (estos sobre todas las filas de ese destino o mes)
+        precio = filas['precio_noche'].astype('float64')
+        celdas = _estadisticos(precio.groupby([filas['Destino'], filas['Mes']], observed=True))
+        self.celdas = _reemplazar(self.celdas, celdas)
+
+        destinos = {destino for destino, _ in claves}
+        meses = {mes for _, mes in claves}
+        del_destino = airbnb.loc[airbnb['Destino'].isin(destinos)]
+        del_mes = airbnb.loc[airbnb['Mes'].isin(meses)]
+        self.por_destino = _reemplazar(self.por_destino, _estadisticos(
+            del_destino['precio_noche'].astype('float64').groupby(del_destino['Destino'], observed=True)))
+        self.por_mes = _reemplazar(self.por_mes, _estadisticos(
+            del_mes['precio_noche'].astype('float64').groupby(del_mes['Mes'], observed=True)))
+
+    # Accesos con la misma forma que tenían los groupby de las páginas:
+    # una fila por grupo y la columna 'precio_noche' con el estadístico pedido
+
+    def precio_por_destino(self, estadistico='mean'):
+        return (self.por_destino[[estadistico]].rename(columns={estadistico: 'precio_noche'})
+                .sort_values(by='precio_noche', ascending=False).reset_index())
+
+    def precio_por_mes(self, estadistico='mean'):
+        return self.por_mes[[estadistico]].rename(columns={estadistico: 'precio_noche'}).reset_index()
+
+    def precio_por_mes_y_destino(self, destinos, estadistico='mean'):
+        celdas = self.celdas[[estadistico]].rename(columns={estadistico: 'precio_noche'}).reset_index()
+        return celdas.loc[celdas['Destino'].isin(destinos)].reset_index(drop=True)
+
+    def precio_del_mes(self, mes, estadistico='mean'):
+        celdas = self.celdas[[estadistico]].rename(columns={estadistico: 'precio_noche'}).reset_index()
+        return celdas.loc[celdas['Mes'] == mes, ['Destino', 'precio_noche']].reset_index(drop=True)
@@ -0,0 +1,197 @@
+# -*- coding: utf-8 -*-
+
+# Carga compartida del dataset. Streamlit vuelve a ejecutar el script en cada
+# interacción, pero este módulo solo se importa una vez por proceso: aquí vive
+# un único DataFrame por proceso, compartido por todas las sesiones, junto con
+# lo que se deriva de él (índice del Buscador, cubo de agregados, densidades).
+#
+# Los datos salen del almacén de lotes (almacen.py) si tiene alguno y, si no,
+# de airbnb.parquet. Con el fichero único, un cambio de mtime o tamaño obliga a
+# recargarlo todo. Con el almacén, cada llamada lista sus lotes (un listdir) y,
+# si hay lotes nuevos, solo se leen sus particiones y solo se actualizan los
+# pares (Destino, Mes) afectados del DataFrame y de los derivados, sin
+# reiniciar la app.
+#
+# Cada versión preparada (DataFrame + derivados) se exporta como instantánea
+# mapeable (compartido.py): si varios procesos de Streamlit corren en la misma
+# máquina, el primero que ve una versión la escribe y los demás la mapean sin
+# copia en lugar de leer y calcular cada uno la suya.
+#
+# El DataFrame y los derivados son compartidos: las páginas no deben modificarlos.
+
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+import almacen
+import compartido
+import cubo
+import densidades
+import indice
+import ingesta
+
+RUTA_DATOS = os.environ.get('AIRBNB_DATOS', ingesta.RUTA_DATOS)
+RUTA_ALMACEN = almacen.RUTA_ALMACEN
+
+# Derivados que se construyen bajo demanda y saben actualizarse por pares
+DERIVADOS = {'indice': indice.IndiceBuscador,
+             'cubo': cubo.CuboPrecios,
+             'densidades': densidades.DensidadesPrecio}
+
+_cerrojo = threading.Lock()
+_contadores = {'llamadas': 0, 'cargas': 0, 'segundos_carga': 0.0, 'ultima_carga': None,
+               'actualizaciones': 0, 'segundos_actualizacion': 0.0, 'mapeos': 0, 'segundos_mapeo': 0.0}
+
+
+def _version_fichero(ruta):
+    # Si aún no se ha hecho la ingesta la hacemos ahora, una sola vez
+    if not os.path.exists(ruta):
+        with _cerrojo:
+            if not os.path.exists(ruta):
+                ingesta.preparar(ruta_datos=ruta)
+    info = os.stat(ruta)
+    return f'{info.st_mtime_ns}-{info.st_size}'
+
+
+def _contar(contador, segundos):
+    with _cerrojo:
+        _contadores[contador] += 1
+        if contador == 'cargas':
+            _contadores['segundos_carga'] += segundos
+            _contadores['ultima_carga'] = segundos
+        elif contador == 'mapeos':
+            _contadores['segundos_mapeo'] += segundos
+        else:
+            _contadores['segundos_actualizacion'] += segundos
+
+
+class DatosAirbnb:
+
+    def __init__(self, ruta_datos, ruta_almacen):
+        self.ruta_datos = ruta_datos
+        self.ruta_almacen = ruta_almacen
+        self.version = None
+        self.airbnb = None
+        self.lotes = []
+        self._derivados = {}
+        self._cerrojo = threading.Lock()
+
+    def _origen(self):
+        lotes = almacen.lotes(self.ruta_almacen)
+        if lotes:
+            return almacen.version_almacen(lotes), lotes
+        return _version_fichero(self.ruta_datos), []
+
+    def refrescar(self):
+        version, lotes = self._origen()
+        if version == self.version:
+            return self
+        with self._cerrojo:
+            if version == self.version:
+                return self
+            inicio = time.perf_counter()
+            nuevos = [lote for lote in lotes if lote not in self.lotes]
+            mapeado = compartido.mapear(version)
+            if mapeado is not None:
+                # Otro proceso ya preparó esta versión
+                self.airbnb, self._derivados = mapeado
+                _contar('mapeos', time.perf_counter() - inicio)
+            # Incremental solo si todos los lotes ya leídos siguen ahí
+            elif self.lotes and len(nuevos) == len(lotes) - len(self.lotes):
+                self._actualizar(nuevos)
+                self._compartir(version)
+                _contar('actualizaciones', time.perf_counter() - inicio)
+            else:
+                self._cargar(lotes)
+                self._compartir(version)
+                _contar('cargas', time.perf_counter() - inicio)
+            self.version, self.lotes = version, lotes
+        return self
+
+    def _cargar(self, lotes):
+        if lotes:
+            self.airbnb = almacen.leer(almacen.particiones(lotes, self.ruta_almacen))
+        else:
+            self.airbnb = pd.read_parquet(self.ruta_datos)
+        self._derivados = {}
+
+    def _actualizar(self, nuevos):
+        # Solo se leen las particiones de los lotes nuevos; sus pares (Destino, Mes)
+        # sustituyen a los que ya había
+        filas = almacen.leer(almacen.particiones(nuevos, self.ruta_almacen))
+        claves = set(zip(filas['Destino'], filas['Mes']))
+
+        n_meses = len(ingesta.MESES)
+        codigos = (self.airbnb['Destino'].cat.codes.to_numpy().astype(np.int64) * n_meses
+                   + self.airbnb['Mes'].cat.codes.to_numpy())
+        afectados = np.isin(codigos, [ingesta.CCAA.index(destino) * n_meses + ingesta.MESES.index(mes)
+                                      for destino, mes in claves])
+        self.airbnb = pd.concat([self.airbnb.loc[~afectados], filas], ignore_index=True)
+
+        for derivado in self._derivados.values():
+            derivado.actualizar(self.airbnb, filas, claves)
+
+    def _compartir(self, version):
+        # Exportamos la versión con todos sus derivados y pasamos a usar el mapeo,
+        # para que este proceso tampoco guarde una copia privada
+        for nombre, clase in DERIVADOS.items():
+            if nombre not in self._derivados:
+                self._derivados[nombre] = clase(self.airbnb)
+        compartido.exportar(version, self._derivados)
+        mapeado = compartido.mapear(version)
+        if mapeado is not None:
+            self.airbnb, self._derivados = mapeado
+
+    def derivado(self, nombre):
+        self.refrescar()
+        derivado = self._derivados.get(nombre)
+        if derivado is None:
+            with self._cerrojo:
+                derivado = self._derivados.get(nombre)
+                if derivado is None:
+                    derivado = self._derivados[nombre] = DERIVADOS[nombre](self.airbnb)
+        return derivado
+
+
+@st.cache_resource(show_spinner=False)
+def _estado(ruta_datos, ruta_almacen):
+    return DatosAirbnb(ruta_datos, ruta_almacen)
+
+
+def estado(ruta=RUTA_DATOS, ruta_almacen=RUTA_ALMACEN):
+    with _cerrojo:
+        _contadores['llamadas'] += 1
+    return _estado(ruta, ruta_almacen).refrescar()
+
+
+def version_datos(ruta=RUTA_DATOS, ruta_almacen=RUTA_ALMACEN):
+    return estado(ruta, ruta_almacen).version
+
+
+def cargar_airbnb(ruta=RUTA_DATOS, ruta_almacen=RUTA_ALMACEN):
+    return estado(ruta, ruta_almacen).airbnb
+
+
+def cargar_indice(ruta=RUTA_DATOS, ruta_almacen=RUTA_ALMACEN):
+    return estado(ruta, ruta_almacen).derivado('indice')
+
+
+def cargar_cubo(ruta=RUTA_DATOS, ruta_almacen=RUTA_ALMACEN):
+    return estado(ruta, ruta_almacen).derivado('cubo')
+
+
+def cargar_densidades(ruta=RUTA_DATOS, ruta_almacen=RUTA_ALMACEN):
+    return estado(ruta, ruta_almacen).derivado('densidades')
+
+
+def estadisticas():
+    with _cerrojo:
+        contadores = dict(_contadores)
+    contadores['aciertos'] = (contadores['llamadas'] - contadores['cargas']
+                              - contadores['actualizaciones'] - contadores['mapeos'])
+    contadores['fallos'] = contadores.pop('cargas')
+    return contadores
@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+
+# Curvas de densidad del precio para el Comparador particular. En lugar de
+# calcular un geom_density de plotnine en cada clic, las curvas se evalúan una
+# vez por versión de los datos sobre una rejilla fija de precios (0-1500 €),
+# para cada mes y para cada par (Mes, Destino). Cualquier selección es después
+# una consulta y se dibuja con trazas ligeras de Plotly.
+#
+# El KDE es gaussiano con el ancho de banda 'nrd0' (el de geom_density). Se
+# calcula para todos los grupos a la vez: binning lineal sobre la rejilla y
+# convolución con el núcleo gaussiano de cada grupo en el dominio de Fourier.
+
+import numpy as np
+import pandas as pd
+
+REJILLA = np.linspace(0, 1500, 301)
+PASO = REJILLA[1] - REJILLA[0]
+
+
+def _ancho_banda(precios):
+    # Regla 'nrd0' de R (bw.nrd0), la que usa geom_density por defecto
+    if len(precios) < 2:
+        return np.nan
+    desviacion = precios.std(ddof=1)
+    q25, q75 = np.percentile(precios, [25, 75])
+    escala = min(desviacion, (q75 - q25) / 1.34) or desviacion or abs(precios[0]) or 1.0
+    return 0.9 * escala * len(precios) ** -0.2
+
+
+def kde_por_grupo(codigos, precios, n_grupos):
+    # Devuelve una matriz (n_grupos, len(REJILLA)) con la densidad de cada grupo
+    n_rejilla = len(REJILLA)
+    orden = np.argsort(codigos, kind='stable')
+    cortes = np.searchsorted(codigos[orden], np.arange(n_grupos + 1))
+    anchos = np.array([_ancho_banda(precios[orden[cortes[g]:cortes[g + 1]]]) for g in range(n_grupos)])
+    tamanos = np.diff(cortes)
+
+    # Binning lineal: cada precio reparte su peso entre los dos nodos vecinos.
+    # Los precios fuera de la rejilla cuentan en el total pero no se dibujan.
+    posicion = precios / PASO
+    dentro = (posicion >= 0) & (posicion <= n_rejilla - 1)
+    izquierda = np.minimum(np.floor(posicion[dentro]).astype(np.int64), n_rejilla - 2)
+    peso_derecha = posicion[dentro] - izquierda
+    celda = codigos[dentro].astype(np.int64) * n_rejilla + izquierda
+    longitud = n_grupos * n_rejilla
+    histogramas = (np.bincount(celda, weights=1 - peso_derecha, minlength=longitud)
+                   + np.bincount(celda + 1, weights=peso_derecha, minlength=longitud)).reshape(n_grupos, n_rejilla)
+
+    # Convolución con un núcleo gaussiano distinto por grupo: la transformada de
+    # la gaussiana es analítica, así que basta un rfft/irfft para todos los grupos.
+    # El relleno evita que las colas den la vuelta (convolución circular).
+    sigmas = np.nan_to_num(anchos / PASO)
+    relleno = int(np.ceil(8 * sigmas.max())) if len(sigmas) else 0
+    n_fft = 1 << int(np.ceil(np.log2(n_rejilla + relleno + 1)))
+    frecuencias = np.fft.rfftfreq(n_fft)
+    nucleos = np.exp(-2 * (np.pi * frecuencias[None, :] * sigmas[:, None]) ** 2)
+    suavizado = np.fft.irfft(np.fft.rfft(histogramas, n_fft, axis=1) * nucleos, n_fft, axis=1)[:, :n_rejilla]
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        densidades = np.clip(suavizado, 0, None) / (tamanos[:, None] * PASO)
+    # Sin al menos dos precios no hay densidad que dibujar
+    densidades[np.isnan(anchos)] = np.nan
+    return densidades.astype(np.float32)
+
+
+class DensidadesPrecio:
+
+    def __init__(self, airbnb):
+        self.meses = list(airbnb['Mes'].cat.categories)
+        self.destinos = list(airbnb['Destino'].cat.categories)
+        precios = airbnb['precio_noche'].to_numpy(dtype=np.float64)
+        mes = airbnb['Mes'].cat.codes.to_numpy().astype(np.int64)
+        destino = airbnb['Destino'].cat.codes.to_numpy().astype(np.int64)
+
+        self.por_mes = kde_por_grupo(mes, precios, len(self.meses))
+        self.por_mes_destino = kde_por_grupo(mes * len(self.destinos) + destino, precios,
+                                             len(self.meses) * len(self.destinos)
+                                             ).reshape(len(self.meses), len(self.destinos), -1)
+
+    @classmethod
+    def desde_arrays(cls, meses, destinos, por_mes, por_mes_destino):
+        # Para curvas ya calculadas (p. ej. mapeadas de disco por compartido.py)
+        densidades = cls.__new__(cls)
+        densidades.meses, densidades.destinos = list(meses), list(destinos)
+        densidades.por_mes, densidades.por_mes_destino = por_mes, por_mes_destino
+        return densidades
+
+    def actualizar(self, airbnb, filas, claves):
+        # Lote nuevo: curvas de los pares afectados (con sus filas) y de sus meses
+        # completos (con todas las filas de esos meses). Las curvas pueden venir de
+        # un mapeo de solo lectura, así que se trabaja sobre una copia
+        self.por_mes, self.por_mes_destino = self.por_mes.copy(), self.por_mes_destino.copy()
+        meses = sorted({self.meses.index(mes) for _, mes in claves})
+        del_mes = airbnb.loc[airbnb['Mes'].cat.codes.isin(meses)]
+        curvas_mes = kde_por_grupo(del_mes['Mes'].cat.codes.to_numpy().astype(np.int64),
+                                   del_mes['precio_noche'].to_numpy(dtype=np.float64), len(self.meses))
+        self.por_mes[meses] = curvas_mes[meses]
+
+        mes = filas['Mes'].cat.codes.to_numpy().astype(np.int64)
+        destino = filas['Destino'].cat.codes.to_numpy().astype(np.int64)
+        curvas = kde_por_grupo(mes * len(self.destinos) + destino, filas['precio_noche'].to_numpy(dtype=np.float64),
+                               len(self.meses) * len(self.destinos)).reshape(len(self.meses), len(self.destinos), -1)
+        for destino, mes in claves:
+            posicion = (self.meses.index(mes), self.destinos.index(destino))
+            self.por_mes_destino[posicion] = curvas[posicion]
+
+    def _tabla(self, curvas, nombres, columna):
+        # Formato largo para Plotly: una fila por punto de la rejilla y curva
+        tabla = pd.DataFrame({columna: np.repeat(nombres, len(REJILLA)),
+                              'precio_noche': np.tile(REJILLA, len(nombres)),
+                              'Distribución': curvas.reshape(-1)})
+        return tabla.dropna()
+
+    def curvas_meses(self, meses):
+        meses = [mes for mes in self.meses if mes in meses]
+        posiciones = [self.meses.index(mes) for mes in meses]
+        return self._tabla(self.por_mes[posiciones], meses, 'Mes')
+
+    def curvas_destinos(self, mes, destinos):
+        destinos = [destino for destino in self.destinos if destino in destinos]
+        posiciones = [self.destinos.index(destino) for destino in destinos]
+        return self._tabla(self.por_mes_destino[self.meses.index(mes)][posiciones], destinos, 'Destino')
+
+
+def figura_densidades(tabla, columna, titulo):
+    import plotly.express as plotlyex
+
+    n_facetas = max(tabla[columna].nunique(), 1)
+    fig = plotlyex.line(tabla, x='precio_noche', y='Distribución', color=columna,
+                        facet_row=columna, title=titulo, height=150 + 180 * n_facetas,
+                        color_discrete_sequence=plotlyex.colors.qualitative.Pastel)
+    fig.update_traces(fill='tozeroy', showlegend=False)
+    fig.for_each_annotation(lambda anotacion: anotacion.update(text=anotacion.text.split('=')[-1]))
+    fig.update_xaxes(title="Precio (€/noche)", tickvals=list(range(0, 1500, 100)),
+                     ticktext=[str(x)+'€' for x in range(0, 1500, 100)])
+    fig.update_yaxes(title='', showticklabels=False)
+    return fig
@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+
+# Gráfico Valoración vs Precio del Buscador. Con pocos alojamientos se envía
+# un scatter SVG normal; por encima de UMBRAL_WEBGL pasa a scattergl (WebGL);
+# y por encima de UMBRAL_AGREGADO los puntos se agregan en un histograma 2-D
+# valoración x precio, dejando el detalle (hover) solo para los N_DETALLE
+# alojamientos mejor valorados. construir_dispersion() mide lo que tarda la
+# figura y medir() el tamaño y tiempo del JSON que viaja al navegador, para
+# poder ajustar los umbrales.
+
+import json
+import time
+
+import numpy as np
+
+UMBRAL_WEBGL = 1000
+UMBRAL_AGREGADO = 5000
+N_DETALLE = 500
+
+COLOR = '#8091DE'
+
+
+def _ejes(fig):
+    fig.update_xaxes(title="Valoración", tickvals=np.arange(2.5, 5.1, 0.25), ticktext=[str(x)+'★' for x in np.arange(2.5, 5.1, 0.25)])
+    fig.update_yaxes(title="Precio (€/noche)", tickvals=list(range(0,1500,100)), ticktext=[str(x)+'€' for x in range(0,1500,100)])
+    return fig
+
+
+def modo_dispersion(n_puntos, umbral_webgl=UMBRAL_WEBGL, umbral_agregado=UMBRAL_AGREGADO):
+    if n_puntos > umbral_agregado:
+        return 'agregado'
+    if n_puntos > umbral_webgl:
+        return 'webgl'
+    return 'svg'
+
+
+def figura_dispersion(grafico_data, titulo, modo):
+    import plotly.express as plotlyex
+    import plotly.graph_objects as go
+
+    etiquetas = {'Valoración': 'Valoración', 'precio_noche': 'Precio (€/noche)'}
+
+    if modo != 'agregado':
+        fig = plotlyex.scatter(grafico_data, x='Valoración', y='precio_noche', title=titulo,
+                               labels=etiquetas, color_discrete_sequence=[COLOR], opacity=0.5,
+                               hover_name='Alojamiento', render_mode='webgl' if modo == 'webgl' else 'svg')
+        return _ejes(fig)
+
+    # Histograma 2-D de todos los puntos, calculado aquí (celdas de 0,05★ x 25 €)
+    # para no mandar las coordenadas al navegador. Encima, con hover, solo los
+    # mejor valorados: grafico_data ya viene ordenado por valoración.
+    bordes_valoracion = np.linspace(2.5, 5.0, 51)
+    bordes_precio = np.linspace(0, 1500, 61)
+    conteos, _, _ = np.histogram2d(grafico_data['Valoración'].to_numpy(dtype=float),
+                                   grafico_data['precio_noche'].to_numpy(dtype=float),
+                                   bins=[bordes_valoracion, bordes_precio])
+    conteos[conteos == 0] = np.nan
+    fig = go.Figure(go.Heatmap(x=(bordes_valoracion[:-1] + bordes_valoracion[1:]) / 2,
+                               y=(bordes_precio[:-1] + bordes_precio[1:]) / 2,
+                               z=conteos.T, colorscale='Blues', colorbar=dict(title='Alojamientos'),
+                               hovertemplate='%{x:.2f}★, %{y:.0f}€: %{z} alojamientos<extra></extra>'))
+    fig.update_layout(title=titulo)
+    detalle = grafico_data.head(N_DETALLE)
+    fig.add_trace(go.Scattergl(x=detalle['Valoración'], y=detalle['precio_noche'], mode='markers',
+                               hovertext=detalle['Alojamiento'], hoverinfo='text+x+y',
+                               marker=dict(color=COLOR, opacity=0.5, size=5),
+                               name=f'Top {N_DETALLE}', showlegend=False))
+    return _ejes(fig)
+
+
+def construir_dispersion(grafico_data, titulo):
+    modo = modo_dispersion(len(grafico_data))
+    inicio = time.perf_counter()
+    fig = figura_dispersion(grafico_data, titulo, modo)
+    return fig, {'modo': modo, 'puntos': len(grafico_data), 'segundos_figura': time.perf_counter() - inicio}
+
+
+def medir(fig):
+    # fig puede ser la figura o el dict que devuelve la caché de figuras
+    inicio = time.perf_counter()
+    payload = len(json.dumps(fig) if isinstance(fig, dict) else fig.to_json())
+    return payload, time.perf_counter() - inicio
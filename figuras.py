@@ -0,0 +1,238 @@
+# -*- coding: utf-8 -*-
+
+# Caché de figuras ya renderizadas, compartida por todas las sesiones del
+# proceso. Muchos usuarios piden las mismas combinaciones de widgets (la misma
+# CCAA y mes en el Buscador, los mismos meses en el Comparador particular...),
+# así que cada figura se construye una vez por versión de los datos y se guarda
+# serializada: el JSON de Plotly o los bytes del PNG de plotnine.
+#
+# La clave es el gráfico, el estado normalizado de los widgets que lo
+# determinan (los multiselects como conjuntos ordenados) y la versión de los
+# datos. Solo entra lo que cambia la figura: el gráfico del Buscador no depende
+# del rango de precios, así que ese slider no forma parte de su clave.
+#
+# Es una LRU acotada por bytes, no por entradas: un mapa interactivo ocupa cien
+# veces más que una serie temporal. Debajo hay una segunda capa en disco,
+#
+#   cache/figuras/<versión>-<versión del código>/<gráfico>-<hash del estado>.json|png
+#
+# La versión del código es un hash de los módulos de la app y de las versiones
+# de Plotly, matplotlib y plotnine: un despliegue que cambia cómo se dibuja una
+# figura no sirve las que dejó el código anterior.
+#
+# La capa en disco es compartida por todos los procesos y solo la escribe
+# precalentar.py, con las figuras que enumera variantes() de cada página: así
+# ningún usuario paga en frío las combinaciones habituales. La app solo la lee:
+# un fallo en memoria mira antes el disco y, si la figura no está, la construye
+# y la guarda solo en la LRU. Los multiselects admiten 2^17 combinaciones de
+# CCAA, y si cada visita escribiera la suya el disco no tendría límite.
+# Con AIRBNB_CACHE_FIGURAS_MB=0 no se consulta ninguna de las dos (útil para
+# medir sin caché).
+
+import functools
+import glob
+import hashlib
+import importlib.metadata
+import io
+import json
+import os
+import shutil
+import threading
+from collections import OrderedDict
+
+import streamlit as st
+
+import datos
+import metricas
+
+TAMANO_MAXIMO = int(float(os.environ.get('AIRBNB_CACHE_FIGURAS_MB', 64)) * 2**20)
+
+RUTA_FIGURAS = os.path.join(os.environ.get('AIRBNB_CACHE', 'cache'), 'figuras')
+
+RAIZ = os.path.dirname(os.path.abspath(__file__))
+BIBLIOTECAS = ['plotly', 'matplotlib', 'plotnine']
+
+EXTENSIONES = {'plotly': 'json', 'png': 'png'}
+
+_cerrojo = threading.Lock()
+_contadores = {'aciertos_disco': 0}
+
+
+def normalizar(valor):
+    # El orden de selección de un multiselect no cambia la figura
+    if isinstance(valor, (list, tuple, set, frozenset)):
+        return tuple(sorted(set(valor)))
+    return valor
+
+
+class CacheFiguras:
+
+    def __init__(self, tamano_maximo=TAMANO_MAXIMO):
+        self.tamano_maximo = tamano_maximo
+        self.tamano = 0
+        self.aciertos = 0
+        self.fallos = 0
+        self.expulsiones = 0
+        self._entradas = OrderedDict()
+        self._cerrojo = threading.Lock()
+
+    def obtener(self, clave, construir):
+        with self._cerrojo:
+            contenido = self._entradas.get(clave)
+            if contenido is not None:
+                self._entradas.move_to_end(clave)
+                self.aciertos += 1
+                return contenido
+            self.fallos += 1
+
+        # Se construye fuera del cerrojo: si dos sesiones piden a la vez la
+        # misma figura, las dos la construyen y se queda una
+        contenido = construir()
+        if len(contenido) > self.tamano_maximo:
+            return contenido
+        with self._cerrojo:
+            if clave not in self._entradas:
+                self._entradas[clave] = contenido
+                self.tamano += len(contenido)
+            while self.tamano > self.tamano_maximo:
+                _, expulsado = self._entradas.popitem(last=False)
+                self.tamano -= len(expulsado)
+                self.expulsiones += 1
+        return contenido
+
+    def estadisticas(self):
+        with self._cerrojo:
+            consultas = self.aciertos + self.fallos
+            return {'entradas': len(self._entradas), 'bytes': self.tamano, 'tamano_maximo': self.tamano_maximo,
+                    'aciertos': self.aciertos, 'fallos': self.fallos, 'expulsiones': self.expulsiones,
+                    'tasa_aciertos': self.aciertos / consultas if consultas else None}
+
+
+@st.cache_resource(show_spinner=False)
+def _cache(tamano_maximo=TAMANO_MAXIMO):
+    return CacheFiguras(tamano_maximo)
+
+
+def _clave(grafico, estado):
+    return (grafico, datos.version_datos(),
+            tuple(sorted((nombre, normalizar(valor)) for nombre, valor in estado.items())))
+
+
+@functools.lru_cache(maxsize=None)
+def version_codigo():
+    resumen = hashlib.sha1()
+    for ruta in sorted(glob.glob(os.path.join(RAIZ, '*.py')) + glob.glob(os.path.join(RAIZ, 'paginas', '*.py'))):
+        resumen.update(os.path.relpath(ruta, RAIZ).encode('utf-8'))
+        with open(ruta, 'rb') as fichero:
+            resumen.update(fichero.read())
+    for biblioteca in BIBLIOTECAS:
+        try:
+            resumen.update(f'{biblioteca}=={importlib.metadata.version(biblioteca)}'.encode())
+        except importlib.metadata.PackageNotFoundError:
+            pass
+    return resumen.hexdigest()[:12]
+
+
+def _directorio(version):
+    return f'{version}-{version_codigo()}'
+
+
+def ruta_figura(clave, formato):
+    grafico, version, estado = clave
+    resumen = hashlib.sha1(repr(estado).encode('utf-8')).hexdigest()[:16]
+    return os.path.join(RUTA_FIGURAS, _directorio(version), f'{grafico}-{resumen}.{EXTENSIONES[formato]}')
+
+
+def _serializar_plotly(construir):
+    with metricas.etapa('figura'):
+        fig = construir()
+    with metricas.etapa('serializacion') as medida:
+        contenido = fig.to_json().encode()
+        medida.bytes = len(contenido)
+    return contenido
+
+
+def _serializar_png(construir):
+    # construir() devuelve una figura de matplotlib (p. ej. ggplot.draw())
+    import matplotlib.pyplot as plt
+
+    with metricas.etapa('figura'):
+        fig = construir()
+    with metricas.etapa('serializacion') as medida:
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format='png', bbox_inches='tight')
+        medida.bytes = buffer.tell()
+    plt.close(fig)
+    return buffer.getvalue()
+
+
+SERIALIZAR = {'plotly': _serializar_plotly, 'png': _serializar_png}
+
+
+def _escribir(ruta, contenido):
+    # Escritura atómica: otro proceso puede estar leyendo la misma figura
+    os.makedirs(os.path.dirname(ruta), exist_ok=True)
+    temporal = f'{ruta}.{os.getpid()}.{threading.get_ident()}.tmp'
+    with open(temporal, 'wb') as fichero:
+        fichero.write(contenido)
+    os.replace(temporal, ruta)
+
+
+def _contenido(grafico, estado, construir, formato):
+    clave = _clave(grafico, estado)
+    if not TAMANO_MAXIMO:
+        return SERIALIZAR[formato](construir)
+
+    def cargar():
+        # Antes de construirla miramos el disco: la puede haber dejado el
+        # precalentado. Lo que construye la app no se escribe en disco
+        try:
+            with open(ruta_figura(clave, formato), 'rb') as fichero:
+                contenido = fichero.read()
+        except FileNotFoundError:
+            contenido = SERIALIZAR[formato](construir)
+        else:
+            with _cerrojo:
+                _contadores['aciertos_disco'] += 1
+        return contenido
+
+    return _cache().obtener(clave, cargar)
+
+
+def plotly(grafico, estado, construir):
+    # construir() devuelve una figura de Plotly; st.plotly_chart acepta el dict
+    contenido = _contenido(grafico, estado, construir, 'plotly')
+    with metricas.etapa('decodificar') as medida:
+        medida.bytes = len(contenido)
+        return json.loads(contenido)
+
+
+def png(grafico, estado, construir):
+    return _contenido(grafico, estado, construir, 'png')
+
+
+def precalentar(grafico, estado, construir, formato):
+    # Deja la figura en disco sin pasar por la caché en memoria. Devuelve los
+    # bytes escritos (0 si ya estaba)
+    ruta = ruta_figura(_clave(grafico, estado), formato)
+    if os.path.exists(ruta):
+        return 0
+    contenido = SERIALIZAR[formato](construir)
+    _escribir(ruta, contenido)
+    return len(contenido)
+
+
+def limpiar(version):
+    # Borra las figuras en disco de otras versiones de los datos o del código
+    if not os.path.isdir(RUTA_FIGURAS):
+        return
+    for nombre in os.listdir(RUTA_FIGURAS):
+        if nombre != _directorio(version):
+            shutil.rmtree(os.path.join(RUTA_FIGURAS, nombre), ignore_errors=True)
+
+
+def estadisticas():
+    estadisticas_cache = _cache().estadisticas()
+    with _cerrojo:
+        estadisticas_cache.update(_contadores)
+    return estadisticas_cache
@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+
+# Geometría de las Comunidades Autónomas para el Mapa. El shapefile se limpia
+# (sin Ceuta ni Melilla, nombres como en los datos), se simplifica y se guarda
+# como GeoParquet; después se carga una sola vez por proceso. Cada mapa solo
+# necesita unirla con las medias del mes, que salen del cubo de agregados.
+# geopandas se importa al cargar la geometría, no al importar el módulo.
+
+import os
+
+import streamlit as st
+
+RUTA_SHAPEFILE = 'Comunidades_Autonomas_ETRS89_30N.shp'
+
+# Tolerancia de simplificación en metros (EPSG:25830). A 8 pulgadas de ancho
+# cada píxel cubre más de un kilómetro, así que 250 m no se notan en el mapa.
+# Con 0 se conserva la geometría original.
+TOLERANCIA = 250
+
+# Nombres del shapefile que no coinciden con los Destino de los datos
+RENOMBRAR = {'Principado de Asturias': 'Asturias',
+             'Castilla - La Mancha': 'Castilla-La Mancha',
+             'Comunidad Foral de Navarra': 'Navarra'}
+
+
+def ruta_geoparquet(tolerancia=TOLERANCIA):
+    return f'comunidades_{tolerancia}m.parquet'
+
+
+def preparar_comunidades(ruta_shapefile=RUTA_SHAPEFILE, tolerancia=TOLERANCIA):
+    import geopandas as gpd
+
+    comunidades = gpd.read_file(ruta_shapefile)
+    # Las 17 primeras filas son las Comunidades; las dos últimas, Ceuta y Melilla
+    comunidades = comunidades.iloc[range(17)]
+    comunidades = comunidades[['Texto', 'geometry']].rename(columns={'Texto': 'Destino'})
+    comunidades['Destino'] = comunidades['Destino'].replace(RENOMBRAR)
+    if tolerancia:
+        comunidades['geometry'] = comunidades.geometry.simplify(tolerancia, preserve_topology=True)
+    comunidades = comunidades.reset_index(drop=True)
+    # Escribimos en un temporal y renombramos: otros procesos que arrancan a la
+    # vez pueden estar leyendo el GeoParquet
+    ruta = ruta_geoparquet(tolerancia)
+    temporal = f'{ruta}.{os.getpid()}.tmp'
+    comunidades.to_parquet(temporal, index=False)
+    os.replace(temporal, ruta)
+    return comunidades
+
+
+@st.cache_resource(show_spinner=False)
+def cargar_comunidades(tolerancia=TOLERANCIA):
+    import geopandas as gpd
+
+    # Reutilizamos el GeoParquet mientras sea más reciente que el shapefile
+    ruta = ruta_geoparquet(tolerancia)
+    if os.path.exists(ruta) and os.path.getmtime(ruta) >= os.path.getmtime(RUTA_SHAPEFILE):
+        return gpd.read_parquet(ruta)
+    return preparar_comunidades(tolerancia=tolerancia)
+
+
+def mapa_del_mes(cubo, mes, estadistico='mean'):
+    return cargar_comunidades().merge(cubo.precio_del_mes(mes, estadistico), how='inner', on='Destino')
+
+
+if __name__ == '__main__':
+    comunidades = preparar_comunidades()
+    print(f'{len(comunidades)} comunidades escritas en {ruta_geoparquet()}')
@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+
+# Índice del Buscador: cada par (Destino, Mes) apunta a un tramo contiguo de
+# alojamientos ya ordenado por valoración y nº de reseñas. Dentro de cada tramo
+# guardamos además los precios ordenados, de modo que un rango de precios es una
+# búsqueda binaria seguida de un top-k sobre las posiciones candidatas. El coste
+# de cada consulta depende del tamaño del tramo, no del total del dataset.
+
+import numpy as np
+import pandas as pd
+
+ORDEN_BUSCADOR = ['Valoración', 'Nº Reseñas']
+
+
+class TramoBuscador:
+
+    def __init__(self, datos, orden=None, precios=None):
+        # datos ya viene ordenado por ORDEN_BUSCADOR (mejor primero), así que una
+        # posición menor dentro del tramo es un alojamiento mejor valorado
+        self.datos = datos
+        if orden is None:
+            precios = datos['precio_noche'].to_numpy()
+            orden = np.argsort(precios, kind='stable').astype(np.int32)
+            precios = precios[orden]
+        self.orden = orden
+        self.precios = precios
+
+    def __len__(self):
+        return len(self.datos)
+
+    def top(self, precio_min, precio_max, k=20):
+        inicio = np.searchsorted(self.precios, precio_min, side='left')
+        fin = np.searchsorted(self.precios, precio_max, side='right')
+        candidatos = self.orden[inicio:fin]
+        if len(candidatos) > k:
+            candidatos = np.partition(candidatos, k - 1)[:k]
+        return self.datos.iloc[np.sort(candidatos)]
+
+
+class IndiceBuscador:
+
+    def __init__(self, airbnb):
+        ordenado = airbnb.sort_values(['Destino', 'Mes'] + ORDEN_BUSCADOR,
+                                      ascending=[True, True, False, False],
+                                      na_position='last', kind='stable').reset_index(drop=True)
+
+        # Los códigos de las categorías identifican cada par (Destino, Mes);
+        # tras ordenar, cada par ocupa un bloque contiguo de filas
+        codigos = (ordenado['Destino'].cat.codes.to_numpy().astype(np.int64) * len(ordenado['Mes'].cat.categories)
+                   + ordenado['Mes'].cat.codes.to_numpy())
+        cortes = np.flatnonzero(np.diff(codigos)) + 1
+        inicios = np.concatenate(([0], cortes)).astype(np.int64)
+        fines = np.concatenate((cortes, [len(ordenado)])).astype(np.int64)
+
+        # Orden por precio dentro de cada tramo, para todos a la vez: posiciones
+        # relativas al inicio de su tramo y los precios ya ordenados
+        precios = ordenado['precio_noche'].to_numpy()
+        por_precio = np.lexsort((precios, codigos))
+        orden = (por_precio - np.repeat(inicios, fines - inicios)).astype(np.int32)
+
+        self._montar(ordenado, inicios, fines, orden, precios[por_precio])
+
+    @classmethod
+    def desde_arrays(cls, ordenado, inicios, fines, orden, precios):
+        # Para un índice ya calculado (p. ej. mapeado de disco por compartido.py)
+        indice = cls.__new__(cls)
+        indice._montar(ordenado, inicios, fines, orden, precios)
+        return indice
+
+    def _montar(self, ordenado, inicios, fines, orden, precios):
+        self.ordenado, self.inicios, self.fines, self.orden, self.precios = ordenado, inicios, fines, orden, precios
+
+        destinos = ordenado['Destino'].cat.categories
+        meses = ordenado['Mes'].cat.categories
+        self.tramos = {}
+        for (destino, mes), inicio, fin in self._posiciones():
+            self.tramos[(destinos[destino], meses[mes])] = TramoBuscador(ordenado.iloc[inicio:fin], orden[inicio:fin],
+                                                                          precios[inicio:fin])
+
+        self._vacio = TramoBuscador(ordenado.iloc[0:0])
+
+    def _posiciones(self):
+        # ((código de Destino, código de Mes), inicio, fin) de cada tramo no vacío
+        codigos_destino = self.ordenado['Destino'].array.codes
+        codigos_mes = self.ordenado['Mes'].array.codes
+        for inicio, fin in zip(self.inicios, self.fines):
+            if fin > inicio:
+                yield (int(codigos_destino[inicio]), int(codigos_mes[inicio])), int(inicio), int(fin)
+
+    def actualizar(self, airbnb, filas, claves):
+        # Lote nuevo: solo se ordenan las filas del lote. Los tramos de los demás
+        # pares se copian tal cual, con su orden por precio, y se intercalan con
+        # los nuevos por (Destino, Mes), así que los arrays globales siguen
+        # describiendo el índice entero y compartido.py lo exporta sin rehacerlo
+        nuevo = IndiceBuscador(filas)
+        destinos = self.ordenado['Destino'].cat.categories
+        meses = self.ordenado['Mes'].cat.categories
+        afectados = {(destinos.get_loc(destino), meses.get_loc(mes)) for destino, mes in claves}
+        piezas = sorted([(codigo, inicio, fin, self) for codigo, inicio, fin in self._posiciones()
+                         if codigo not in afectados]
+                        + [(codigo, inicio, fin, nuevo) for codigo, inicio, fin in nuevo._posiciones()],
+                        key=lambda pieza: pieza[0])
+
+        ordenado = pd.concat([fuente.ordenado.iloc[inicio:fin] for _, inicio, fin, fuente in piezas],
+                             ignore_index=True)
+        fines = np.cumsum([fin - inicio for _, inicio, fin, _ in piezas], dtype=np.int64)
+        inicios = np.concatenate(([0], fines[:-1])).astype(np.int64)
+        orden = np.concatenate([fuente.orden[inicio:fin] for _, inicio, fin, fuente in piezas])
+        precios = np.concatenate([fuente.precios[inicio:fin] for _, inicio, fin, fuente in piezas])
+        self._montar(ordenado, inicios, fines, orden, precios)
+
+    def tramo(self, destino, mes):
+        return self.tramos.get((destino, mes), self._vacio)
+
+    def top(self, destino, mes, precio_min, precio_max, k=20):
+        return self.tramo(destino, mes).top(precio_min, precio_max, k)
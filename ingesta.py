@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+
+# Ingesta de los datos scrapeados: convierte airbnb_raw.csv en la tabla tipada
+# y columnar (Parquet) que carga el dashboard. Todo el parseo se hace con
+# operaciones vectorizadas de texto/regex, sin apply fila a fila.
+#
+# Uso: python ingesta.py [airbnb_raw.csv] [airbnb.parquet]
+
+import sys
+
+import pandas as pd
+
+RUTA_RAW = 'airbnb_raw.csv'
+RUTA_DATOS = 'airbnb.parquet'
+
+MESES = ['Febrero', 'Marzo', 'Abril', 'Mayo', 'Junio', 'Julio', 'Agosto',
+         'Septiembre', 'Octubre', 'Noviembre', 'Diciembre', 'Enero']
+
+CCAA = ['Andalucía', 'Aragón', 'Asturias', 'Cantabria', 'Castilla-La Mancha',
+        'Castilla y León', 'Cataluña', 'Extremadura', 'Galicia', 'Islas Baleares',
+        'Canarias', 'La Rioja', 'Comunidad de Madrid', 'Región de Murcia',
+        'Navarra', 'País Vasco', 'Comunidad Valenciana']
+
+# "61 € por noche" o "150 € por noche, inicialmente 1.200 €" (el punto separa miles)
+PATRON_PRECIO = r'^\s*(?P<precio>[\d.]+)\s*€ por noche(?:,\s*inicialmente\s*(?P<inicial>[\d.]+)\s*€)?'
+# "4,71 (17)"; "Nuevo" o vacío cuando el alojamiento aún no tiene reseñas
+PATRON_RATING = r'^\s*(?P<valoracion>\d+,\d+)\s*\((?P<resenas>\d+)\)'
+
+
+def _a_euros(texto):
+    return pd.to_numeric(texto.str.replace('.', '', regex=False), errors='coerce')
+
+
+def parsear(raw):
+    precio = raw['precio_noche'].astype('string').str.extract(PATRON_PRECIO)
+    rating = raw['rating'].astype('string').str.extract(PATRON_RATING)
+
+    precio_noche = _a_euros(precio['precio'])
+    precio_inicial = _a_euros(precio['inicial'])
+    descuento = (100 * (1 - precio_noche / precio_inicial)).round().fillna(0)
+
+    airbnb = pd.DataFrame({
+        'Mes': pd.Categorical(raw['mes'].str.strip().str.capitalize(), categories=MESES, ordered=True),
+        'Destino': pd.Categorical(raw['destino'].str.strip(), categories=CCAA),
+        'Alojamiento': raw['nombre'].astype(str),
+        'precio_noche': precio_noche.astype('float32'),
+        'Descuento': descuento.astype('float32'),
+        'Valoración': pd.to_numeric(rating['valoracion'].str.replace(',', '.', regex=False),
+                                    errors='coerce').astype('float32'),
+        'Nº Reseñas': pd.to_numeric(rating['resenas'], errors='coerce').fillna(0).astype('int32'),
+    })
+
+    # Sin precio, mes o destino reconocible el alojamiento no sirve a ninguna página
+    validos = airbnb['precio_noche'].notna() & airbnb['Mes'].notna() & airbnb['Destino'].notna()
+    # Una fila repetida entera es el mismo anuncio visto dos veces al scrapear. Los
+    # nombres son genéricos ("Apartamento en Málaga"), así que dos anuncios con el
+    # mismo nombre pero distinto precio, descuento o valoración se conservan
+    return airbnb.loc[validos].drop_duplicates().reset_index(drop=True)
+
+
+def leer_raw(ruta_raw=RUTA_RAW):
+    return pd.read_csv(ruta_raw, sep=';', dtype=str, keep_default_na=False, encoding='utf-8')
+
+
+def preparar(ruta_raw=RUTA_RAW, ruta_datos=RUTA_DATOS):
+    airbnb = parsear(leer_raw(ruta_raw))
+    airbnb.to_parquet(ruta_datos, index=False)
+    return airbnb
+
+
+if __name__ == '__main__':
+    airbnb = preparar(*sys.argv[1:3])
+    print(f'{len(airbnb)} alojamientos escritos en {sys.argv[2] if len(sys.argv) > 2 else RUTA_DATOS}')
+    print(airbnb.dtypes.to_string())
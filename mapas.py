@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+
+# Render de los mapas del precio medio por Comunidad Autónoma. Los doce mapas
+# mensuales se generan por adelantado (PNG o SVG) y se guardan en disco por
+# versión de los datos; la app solo sirve los bytes. Se dibujan con Figure de
+# matplotlib, sin el estado global de pyplot, que no es seguro entre sesiones.
+#
+# También hay un modo interactivo: un choropleth de Plotly sobre el GeoJSON
+# simplificado, que dibuja el navegador en lugar del servidor.
+#
+# matplotlib, geopandas y Plotly solo se importan si hay que renderizar: servir
+# un PNG ya generado no los necesita.
+#
+# Uso: python mapas.py [png|svg]
+
+import io
+import os
+import shutil
+import sys
+
+import streamlit as st
+
+import datos
+import figuras
+import geo
+import ingesta
+
+RUTA_CACHE = os.environ.get('AIRBNB_CACHE', 'cache')
+
+
+RUTA_MAPAS = os.path.join(RUTA_CACHE, 'mapas')
+
+
+def version_mapas():
+    # Un mapa depende de los datos, de la geometría simplificada y del código
+    # que lo dibuja (la misma versión del código que la caché de figuras)
+    return f'{datos.version_datos()}-{geo.TOLERANCIA}m-{figuras.version_codigo()}'
+
+
+def _ruta_mapa(version, mes, formato):
+    return os.path.join(RUTA_MAPAS, version, f'{mes}.{formato}')
+
+
+def _limpiar(version):
+    # Los mapas de otras versiones de los datos o del código ya no se van a pedir
+    for nombre in os.listdir(RUTA_MAPAS):
+        if nombre != version:
+            shutil.rmtree(os.path.join(RUTA_MAPAS, nombre), ignore_errors=True)
+
+
+def renderizar_mapa(comunidades_mes, mes, formato='png'):
+    from matplotlib.figure import Figure
+
+    fig = Figure(figsize=(8, 8))
+    ax = fig.subplots()
+
+    comunidades_mes.plot(ax=ax, column='precio_noche', legend=True,
+                         legend_kwds={'label': "Precio medio (€/noche)",
+                                      'orientation': "horizontal"})
+
+    ax.set_title(f'Precio medio por Comunidad Autónoma para {mes}')
+    ax.axis('off')
+
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format=formato, bbox_inches='tight')
+    return buffer.getvalue()
+
+
+def prerenderizar_mapas(cubo, version, formato='png'):
+    # Escribimos en un temporal y renombramos: otros procesos pueden estar
+    # leyendo el mismo directorio
+    mapas = {}
+    nuevos = False
+    for mes in ingesta.MESES:
+        ruta = _ruta_mapa(version, mes, formato)
+        if os.path.exists(ruta):
+            with open(ruta, 'rb') as fichero:
+                mapas[mes] = fichero.read()
+            continue
+        mapas[mes] = renderizar_mapa(geo.mapa_del_mes(cubo, mes), mes, formato)
+        os.makedirs(os.path.dirname(ruta), exist_ok=True)
+        temporal = f'{ruta}.{os.getpid()}.tmp'
+        with open(temporal, 'wb') as fichero:
+            fichero.write(mapas[mes])
+        os.replace(temporal, ruta)
+        nuevos = True
+    if nuevos:
+        _limpiar(version)
+    return mapas
+
+
+@st.cache_resource(max_entries=2, show_spinner=False)
+def _mapas(version, formato):
+    return prerenderizar_mapas(datos.cargar_cubo(), version, formato)
+
+
+def mapa_mensual(mes, formato='png'):
+    return _mapas(version_mapas(), formato)[mes]
+
+
+@st.cache_resource(show_spinner=False)
+def geojson_comunidades():
+    # Plotly necesita coordenadas geográficas (EPSG:4326)
+    return geo.cargar_comunidades().to_crs(epsg=4326).__geo_interface__
+
+
+def figura_interactiva(cubo, mes):
+    import plotly.express as plotlyex
+
+    data_mapa = cubo.precio_del_mes(mes, 'mean')
+    fig = plotlyex.choropleth(data_mapa, geojson=geojson_comunidades(), locations='Destino',
+                              featureidkey='properties.Destino', color='precio_noche',
+                              title=f'Precio medio por Comunidad Autónoma para {mes}',
+                              labels={'precio_noche': 'Precio medio (€/noche)', 'Destino': 'Comunidad Autónoma'},
+                              color_continuous_scale='Viridis')
+    fig.update_geos(fitbounds='locations', visible=False)
+    fig.update_layout(margin=dict(l=0, r=0, t=40, b=0))
+    return fig
+
+
+if __name__ == '__main__':
+    formato = sys.argv[1] if len(sys.argv) > 1 else 'png'
+    version = version_mapas()
+    mapas = prerenderizar_mapas(datos.cargar_cubo(), version, formato)
+    print(f'{len(mapas)} mapas en {os.path.dirname(_ruta_mapa(version, ingesta.MESES[0], formato))}')
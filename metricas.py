@@ -0,0 +1,212 @@
+# -*- coding: utf-8 -*-
+
+# Instrumentación del render de las páginas. paginas.mostrar() envuelve cada
+# página y, dentro, cada etapa del camino caliente se mide con
+#
+#   with metricas.etapa('datos') as medida:
+#       ...
+#       medida.filas = len(tabla)
+#
+# Etapas habituales: 'datos' (cargar y consultar índice, cubo o densidades),
+# 'filtro', 'figura' (construir la figura de Plotly o el draw() de plotnine),
+# 'serializacion' (JSON de Plotly o PNG), 'decodificar' (leer la figura de la
+# caché) y 'envio' (la llamada a st.*, que vuelve a validar y codificar). Las
+# etapas pueden anidarse: 'figura' incluye lo que se consulte al construirla, y
+# 'total' es la página entera.
+#
+# Por (página, etapa) se guarda un histograma acumulado (para Prometheus) y una
+# ventana con las últimas VENTANA duraciones (para p50/p95 recientes), además de
+# las filas y bytes acumulados. Todo vive en memoria del proceso: se ve en la
+# página oculta Métricas (modo debug) y en exportar_prometheus(). Con
+# AIRBNB_METRICAS_TEXTFILE=<directorio> el texto se escribe además allí (como
+# mucho cada INTERVALO_TEXTFILE segundos) para el textfile collector de
+# node_exporter. En modo debug, con ?perfil=1 en la URL esa ejecución de la
+# página se perfila con pyinstrument (o cProfile si no está instalado) y el
+# informe se guarda entre los últimos N_PERFILES.
+#
+# Solo usa la biblioteca estándar, así que importarlo no encarece el arranque.
+
+import bisect
+import collections
+import contextlib
+import io
+import math
+import os
+import threading
+import time
+
+VENTANA = int(os.environ.get('AIRBNB_METRICAS_VENTANA', 1000))
+
+# Límites (en segundos) de los cubos del histograma
+LIMITES = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+N_PERFILES = 10
+
+RUTA_TEXTFILE = os.environ.get('AIRBNB_METRICAS_TEXTFILE')
+INTERVALO_TEXTFILE = 15
+
+_cerrojo = threading.Lock()
+_histogramas = {}
+_perfiles = collections.deque(maxlen=N_PERFILES)
+_local = threading.local()
+_ultima_escritura = 0.0
+
+
+class Medida:
+
+    def __init__(self):
+        self.filas = None
+        self.bytes = None
+
+
+class Histograma:
+
+    def __init__(self):
+        self.cubos = [0] * (len(LIMITES) + 1)
+        self.suma = 0.0
+        self.n = 0
+        self.filas = 0
+        self.bytes = 0
+        self.recientes = collections.deque(maxlen=VENTANA)
+
+    def anadir(self, segundos, filas=None, n_bytes=None):
+        self.cubos[bisect.bisect_left(LIMITES, segundos)] += 1
+        self.suma += segundos
+        self.n += 1
+        self.filas += filas or 0
+        self.bytes += n_bytes or 0
+        self.recientes.append(segundos)
+
+    def percentil(self, q):
+        ordenados = sorted(self.recientes)
+        if not ordenados:
+            return None
+        return ordenados[max(math.ceil(q * len(ordenados)) - 1, 0)]
+
+
+def registrar(pagina, nombre, segundos, filas=None, n_bytes=None):
+    with _cerrojo:
+        histograma = _histogramas.get((pagina, nombre))
+        if histograma is None:
+            histograma = _histogramas[(pagina, nombre)] = Histograma()
+        histograma.anadir(segundos, filas, n_bytes)
+
+
+@contextlib.contextmanager
+def etapa(nombre):
+    medida = Medida()
+    inicio = time.perf_counter()
+    try:
+        yield medida
+    finally:
+        registrar(getattr(_local, 'pagina', '-'), nombre, time.perf_counter() - inicio, medida.filas, medida.bytes)
+
+
+@contextlib.contextmanager
+def pagina(nombre, perfilar=False):
+    anterior = getattr(_local, 'pagina', '-')
+    _local.pagina = nombre
+    perfilador = _iniciar_perfil() if perfilar else None
+    inicio = time.perf_counter()
+    try:
+        with etapa('total'):
+            yield
+    finally:
+        _local.pagina = anterior
+        if perfilador is not None:
+            _guardar_perfil(nombre, perfilador, time.perf_counter() - inicio)
+        _escribir_textfile()
+
+
+def _iniciar_perfil():
+    try:
+        import pyinstrument
+    except ImportError:
+        import cProfile
+
+        perfilador = cProfile.Profile()
+        perfilador.enable()
+        return perfilador
+    perfilador = pyinstrument.Profiler()
+    perfilador.start()
+    return perfilador
+
+
+def _guardar_perfil(nombre, perfilador, segundos):
+    if hasattr(perfilador, 'output_text'):
+        perfilador.stop()
+        texto, herramienta = perfilador.output_text(), 'pyinstrument'
+    else:
+        import pstats
+
+        perfilador.disable()
+        salida = io.StringIO()
+        pstats.Stats(perfilador, stream=salida).sort_stats('cumulative').print_stats(40)
+        texto, herramienta = salida.getvalue(), 'cProfile'
+    with _cerrojo:
+        _perfiles.append({'pagina': nombre, 'segundos': segundos, 'hora': time.strftime('%H:%M:%S'),
+                          'herramienta': herramienta, 'texto': texto})
+
+
+def perfiles():
+    with _cerrojo:
+        return list(reversed(_perfiles))
+
+
+def resumen():
+    # Una fila por (página, etapa) con los percentiles de la ventana reciente
+    with _cerrojo:
+        filas = []
+        for (nombre_pagina, nombre_etapa), histograma in sorted(_histogramas.items()):
+            filas.append({'página': nombre_pagina, 'etapa': nombre_etapa, 'n': histograma.n,
+                          'p50 ms': histograma.percentil(0.5) * 1000,
+                          'p95 ms': histograma.percentil(0.95) * 1000,
+                          'máx. ms': max(histograma.recientes) * 1000,
+                          'filas/llamada': histograma.filas / histograma.n,
+                          'KB/llamada': histograma.bytes / histograma.n / 1024})
+        return filas
+
+
+def _etiquetas(**etiquetas):
+    def escapar(valor):
+        return str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    return '{' + ','.join(f'{clave}="{escapar(valor)}"' for clave, valor in etiquetas.items()) + '}'
+
+
+def exportar_prometheus():
+    proceso = os.getpid()
+    lineas = ['# HELP airbnb_etapa_segundos Duración de cada etapa del render de las páginas.',
+              '# TYPE airbnb_etapa_segundos histogram']
+    with _cerrojo:
+        histogramas = sorted(_histogramas.items())
+        for (nombre_pagina, nombre_etapa), histograma in histogramas:
+            acumulado = 0
+            for limite, conteo in zip(LIMITES + ('+Inf',), histograma.cubos):
+                acumulado += conteo
+                etiquetas = _etiquetas(pagina=nombre_pagina, etapa=nombre_etapa, proceso=proceso, le=limite)
+                lineas.append(f'airbnb_etapa_segundos_bucket{etiquetas} {acumulado}')
+            etiquetas = _etiquetas(pagina=nombre_pagina, etapa=nombre_etapa, proceso=proceso)
+            lineas.append(f'airbnb_etapa_segundos_sum{etiquetas} {histograma.suma:.6f}')
+            lineas.append(f'airbnb_etapa_segundos_count{etiquetas} {histograma.n}')
+
+        for metrica, atributo, ayuda in [('airbnb_etapa_filas_total', 'filas', 'Filas procesadas por cada etapa.'),
+                                         ('airbnb_etapa_bytes_total', 'bytes', 'Bytes producidos por cada etapa.')]:
+            lineas += [f'# HELP {metrica} {ayuda}', f'# TYPE {metrica} counter']
+            for (nombre_pagina, nombre_etapa), histograma in histogramas:
+                etiquetas = _etiquetas(pagina=nombre_pagina, etapa=nombre_etapa, proceso=proceso)
+                lineas.append(f'{metrica}{etiquetas} {getattr(histograma, atributo)}')
+    return '\n'.join(lineas) + '\n'
+
+
+def _escribir_textfile():
+    global _ultima_escritura
+    if not RUTA_TEXTFILE or time.monotonic() - _ultima_escritura < INTERVALO_TEXTFILE:
+        return
+    _ultima_escritura = time.monotonic()
+    # Escritura atómica: el collector nunca debe leer un fichero a medias
+    os.makedirs(RUTA_TEXTFILE, exist_ok=True)
+    destino = os.path.join(RUTA_TEXTFILE, f'airbnb_{os.getpid()}.prom')
+    temporal = f'{destino}.{threading.get_ident()}.tmp'
+    with open(temporal, 'w', encoding='utf-8') as fichero:
+        fichero.write(exportar_prometheus())
+    os.replace(temporal, destino)
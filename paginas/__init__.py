@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+
+# Registro de las páginas del dashboard. Cada página vive en su propio módulo
+# y solo se importa (con sus dependencias de gráficos, geo y datos) la primera
+# vez que alguien la abre: quien solo ve la Introducción no paga nada más.
+#
+# Cada módulo expone la función que dibuja la página, precargar(), que deja
+# listos los datos que necesita (lo usan el informe de arranque y el precalentado),
+# y variantes(), las figuras que precalentar.py deja hechas en la caché de figuras.
+# mostrar() mide cada página y sus etapas con metricas.py.
+
+import importlib
+import os
+
+import metricas
+
+# El modo debug (página Métricas, contadores de las cachés, perfilado) expone
+# datos internos y puede cargar el servidor: solo existe si quien despliega
+# arranca la app con AIRBNB_DEBUG=1. Sin eso, ?debug=1 en la URL no hace nada
+DEBUG_PERMITIDO = os.environ.get('AIRBNB_DEBUG') == '1'
+
+PAGINAS = {
+    'Introducción': ('paginas.intro', 'set_intro'),
+    'Buscador': ('paginas.buscador', 'set_buscador'),
+    'Comparador general': ('paginas.comparador_general', 'set_comparador_general'),
+    'Comparador particular': ('paginas.comparador_particular', 'set_comparador_particular'),
+    'Serie temporal': ('paginas.serie_temporal', 'set_serie_temp'),
+    'Mapa': ('paginas.mapa', 'set_mapa'),
+}
+
+# Páginas que solo aparecen en el menú en modo debug
+PAGINAS_DEBUG = {
+    'Métricas': ('paginas.metricas', 'set_metricas'),
+}
+
+
+def debug(query_params):
+    return DEBUG_PERMITIDO and query_params.get('debug') == '1'
+
+
+def perfilar(query_params):
+    return debug(query_params) and query_params.get('perfil') == '1'
+
+
+def _entrada(nombre):
+    return PAGINAS[nombre] if nombre in PAGINAS else PAGINAS_DEBUG[nombre]
+
+
+def modulo(nombre):
+    return importlib.import_module(_entrada(nombre)[0])
+
+
+def mostrar(nombre, perfilar=False):
+    with metricas.pagina(nombre, perfilar):
+        getattr(modulo(nombre), _entrada(nombre)[1])()
@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+
+import streamlit as st
+
+import datos
+import dispersion
+import figuras
+import ingesta
+import metricas
+import paginas
+
+
+# Segunda página: Buscador
+
+def set_buscador():
+    
+    st.header('Buscador')
+    
+    st.write("""Introduzca el destino, la fecha y el rango de euros que está
+             dispuesto a gastarse y le mostraremos los 20 alojamientos con
+             mejor valoración para que usted pueda elegir sus vacaciones ideales.""")
+    col1, col2, col3 = st.columns([1, 1, 1])
+    with col1:
+        ccaa_buscador = st.selectbox('Seleccione una Comunidad Autónoma', ['Andalucía',
+                                                                           'Aragón',
+                                                                           'Asturias',
+                                                                           'Cantabria',
+                                                                           'Castilla-La Mancha',
+                                                                           'Castilla y León',
+                                                                           'Cataluña',
+                                                                           'Extremadura',
+                                                                           'Galicia',
+                                                                           'Islas Baleares',
+                                                                           'Canarias',
+                                                                           'La Rioja',
+                                                                           'Comunidad de Madrid',
+                                                                           'Región de Murcia',
+                                                                           'Navarra',
+                                                                           'País Vasco',
+                                                                           'Comunidad Valenciana'])
+    
+    with col2:
+        mes_buscador = st.selectbox('Seleccione un mes', ['Febrero',
+                                                          'Marzo',
+                                                          'Abril',
+                                                          'Mayo',
+                                                          'Junio',
+                                                          'Julio',
+                                                          'Agosto',
+                                                          'Septiembre',
+                                                          'Octubre',
+                                                          'Noviembre',
+                                                          'Diciembre',
+                                                          'Enero'])
+        
+    with col3:
+        precio_min, precio_max = st.slider('Seleccione un rango de precios', 0.0, 1500.0, (200.0, 500.0))
+            
+    # Consulto el índice: el tramo (Destino, Mes) ya está ordenado por valoración,
+    # así que el rango de precios es una búsqueda binaria y un top-20
+    with metricas.etapa('datos'):
+        indice_buscador = datos.cargar_indice()
+    with metricas.etapa('filtro') as medida:
+        tramo = indice_buscador.tramo(ccaa_buscador, mes_buscador)
+        output_data = tramo.top(precio_min, precio_max, k=20)
+        medida.filas = len(tramo)
+    
+    # Muestro las columnas bonitas
+    output_data = output_data[['Alojamiento', 'precio_noche',
+                               'Descuento', 'Valoración', 'Nº Reseñas']].rename(columns={'precio_noche': 'Precio (€/noche)'})
+    
+    if output_data.shape[0] == 0:
+        st.write('Lo sentimos, no hay alojamientos para sus requisitos.')
+    else:
+        st.write('Aquí tiene el top-20 de los mejores alojamientos para sus requisitos:')
+        st.write(f'Destino: {ccaa_buscador}')
+        st.write(f'Mes: {mes_buscador}')
+        with metricas.etapa('envio'):
+            st.dataframe(output_data, hide_index=True)
+        
+    st.write(f'''A continuación, por si no le ha gustado ninguna de las 20 opciones que le hemos propuesto, 
+             le mostraremos un gráfico donde podrá consultar todos los alojamientos disponibles en {ccaa_buscador} en {mes_buscador}. 
+             Pase el ratón por encima de los puntos para ver de que alojamiento se trata, además podrá consultar el precio y la valoración.''')
+    
+    # La figura solo depende del destino y el mes, no del rango de precios
+    info_dispersion = {}
+    fig = figuras.plotly('buscador_dispersion', {'ccaa': ccaa_buscador, 'mes': mes_buscador},
+                         lambda: figura_dispersion(ccaa_buscador, mes_buscador, info_dispersion))
+
+    with metricas.etapa('envio'):
+        st.plotly_chart(fig)
+
+    # Si la figura salió de la caché no hay tiempos de construcción que enseñar
+    if paginas.debug(st.query_params) and info_dispersion:
+        info_dispersion['bytes'], info_dispersion['segundos_json'] = dispersion.medir(fig)
+        st.caption(f'''Modo {info_dispersion['modo']}: {info_dispersion['puntos']} puntos,
+                   {info_dispersion['bytes'] / 1024:.0f} KB de JSON, figura en {info_dispersion['segundos_figura'] * 1000:.0f} ms,
+                   JSON en {info_dispersion['segundos_json'] * 1000:.0f} ms''')
+
+
+def figura_dispersion(ccaa, mes, info=None):
+    # Según el número de puntos: SVG, WebGL o histograma 2-D con detalle de los mejores
+    grafico_data = datos.cargar_indice().tramo(ccaa, mes).datos
+    fig, info_dispersion = dispersion.construir_dispersion(grafico_data, f'Valoración Vs Precio para {ccaa} en {mes}')
+    if info is not None:
+        info.update(info_dispersion)
+    return fig
+
+
+def precargar():
+    datos.cargar_indice()
+
+
+def variantes():
+    # Figuras que deja hechas precalentar.py: (gráfico, formato, función, estado)
+    return [('buscador_dispersion', 'plotly', figura_dispersion, {'ccaa': ccaa, 'mes': mes})
+            for ccaa in ingesta.CCAA for mes in ingesta.MESES]
@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+
+import streamlit as st
+
+import datos
+import figuras
+import metricas
+
+
+# Tercera página: Comparador general
+
+def set_comparador_general():
+    
+    st.header('Comparador de precios general')
+    
+    st.write('''Si no tiene claro donde ni cuándo viajar esta es su página, 
+             aquí encontrará dos gráficos que le ayudarán a comparar precios por Comunidad Autónoma y Mes. 
+             Aproveche y viaje barato!''')
+
+        
+    # Las medias salen del cubo de agregados, calculado una vez por versión de los datos.
+    # Esta página no tiene widgets: las dos figuras se construyen una vez por versión
+    # y después salen de la caché de figuras
+    fig_ccaa = figuras.plotly('comparador_general_ccaa', {}, _figura_ccaa)
+    with metricas.etapa('envio'):
+        st.plotly_chart(fig_ccaa)
+             
+    fig_meses = figuras.plotly('comparador_general_meses', {}, _figura_meses)
+    with metricas.etapa('envio'):
+        st.plotly_chart(fig_meses)
+
+
+def _figura_ccaa():
+    # Plotly se importa al construir la figura, no al arrancar la app
+    import plotly.express as plotlyex
+    
+    with metricas.etapa('datos') as medida:
+        data_ccaa_precio = datos.cargar_cubo().precio_por_destino('mean')
+        medida.filas = len(data_ccaa_precio)
+    
+    fig_ccaa = plotlyex.bar(data_ccaa_precio, x='Destino', y='precio_noche', color='Destino',
+                 title='Precio medio de alojamiento por Comunidad Autónoma',
+                 category_orders={"Destino": data_ccaa_precio['Destino']},
+                 labels={'precio_noche': 'Precio medio (€/noche)', 'Destino': 'Comunidad Autónoma'},
+                 range_y=[150, 250],
+                 color_discrete_sequence=plotlyex.colors.qualitative.Pastel)
+
+    fig_ccaa.update_layout(xaxis=dict(tickangle=315, tickvals=list(range(len(data_ccaa_precio['Destino']))),
+                                  ticktext=data_ccaa_precio['Destino'], tickmode='array'),
+                      xaxis_title='Comunidad Autónoma')
+
+    return fig_ccaa
+
+
+def _figura_meses():
+    import plotly.express as plotlyex
+    
+    # Ya viene ordenado por mes (Mes es un categórico ordenado)
+    with metricas.etapa('datos') as medida:
+        data_mes_precio = datos.cargar_cubo().precio_por_mes('mean')
+        medida.filas = len(data_mes_precio)
+    
+    fig_meses = plotlyex.bar(data_mes_precio, x='Mes', y='precio_noche', color='Mes',
+                 title='Precio medio de alojamiento por mes',
+                 category_orders={"Mes": data_mes_precio['Mes']},
+                 labels={'precio_noche': 'Precio medio (€/noche)', 'Mes': 'Mes'},
+                 range_y=[150, 250],
+                 color_discrete_sequence=plotlyex.colors.qualitative.Pastel)
+
+    fig_meses.update_layout(xaxis=dict(tickangle=315, tickvals=list(range(len(data_mes_precio['Mes']))),
+                                  ticktext=data_mes_precio['Mes'], tickmode='array'),
+                      xaxis_title='Meses')
+
+    return fig_meses
+
+
+def precargar():
+    datos.cargar_cubo()
+
+
+def variantes():
+    return [('comparador_general_ccaa', 'plotly', _figura_ccaa, {}),
+            ('comparador_general_meses', 'plotly', _figura_meses, {})]
@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+
+import streamlit as st
+
+import datos
+import densidades
+import figuras
+import ingesta
+import metricas
+
+
+# Cuarta página: Comparador particular
+
+def set_comparador_particular():
+    st.header('Comparador de precios particular')
+    
+    st.write('''Si no tiene claro donde ni cuándo viajar, está a punto de descubrirlo.''')
+    
+    st.write('''Primero, elija los meses en los que se plantea hacer su viaje y le mostraremos un gráfico con el que podrá tomar la decisión más económica.''')
+    
+    meses_elegir_mes = st.multiselect('Seleccione los meses', ['Febrero',
+                                                               'Marzo',
+                                                               'Abril',
+                                                               'Mayo',
+                                                               'Junio',
+                                                               'Julio',
+                                                               'Agosto',
+                                                               'Septiembre',
+                                                               'Octubre',
+                                                               'Noviembre',
+                                                               'Diciembre',
+                                                               'Enero'])
+    
+    boton_elegir_mes = st.button('Mostrar gráficos por meses')
+    
+    if boton_elegir_mes and len(meses_elegir_mes) > 0:
+        # La figura, si alguien ya pidió esos meses, sale de la caché
+        grafico_elegir_mes = figuras.plotly('comparador_meses', {'meses': meses_elegir_mes},
+                                            lambda: figura_meses(meses_elegir_mes))
+       
+        with metricas.etapa('envio'):
+            st.plotly_chart(grafico_elegir_mes)
+    
+    st.write('''Segundo, una vez haya elegido el mes, elija las Comunidades Autónomas a las que se plantea viajar y le mostraremos un gráfico con el que podrá tomar la decisión más económica.''')
+    
+    mes_elegir_ccaa = st.selectbox('Seleccione un mes', ['Febrero',
+                                                         'Marzo',
+                                                         'Abril',
+                                                         'Mayo',
+                                                         'Junio',
+                                                         'Julio',
+                                                         'Agosto',
+                                                         'Septiembre',
+                                                         'Octubre',
+                                                         'Noviembre',
+                                                         'Diciembre',
+                                                         'Enero'])
+    
+    ccaa_elegir_ccaa = st.multiselect('Seleccione las Comunidades Autónomas', ['Andalucía',
+                                                                               'Aragón',
+                                                                               'Asturias',
+                                                                               'Cantabria',
+                                                                               'Castilla-La Mancha',
+                                                                               'Castilla y León',
+                                                                               'Cataluña',
+                                                                               'Extremadura',
+                                                                               'Galicia',
+                                                                               'Islas Baleares',
+                                                                               'Canarias',
+                                                                               'La Rioja',
+                                                                               'Comunidad de Madrid',
+                                                                               'Región de Murcia',
+                                                                               'Navarra',
+                                                                               'País Vasco',
+                                                                               'Comunidad Valenciana'])
+    
+
+    boton_elegir_ccaa = st.button('Mostrar gráficos por CCAA')
+    
+    if boton_elegir_ccaa and len(ccaa_elegir_ccaa) > 0:
+        grafico_elegir_ccaa = figuras.plotly('comparador_ccaa', {'mes': mes_elegir_ccaa, 'ccaa': ccaa_elegir_ccaa},
+                                             lambda: figura_ccaa(mes_elegir_ccaa, ccaa_elegir_ccaa))
+        
+        with metricas.etapa('envio'):
+            st.plotly_chart(grafico_elegir_ccaa)
+
+
+def figura_meses(meses):
+    # Las curvas de densidad están precalculadas para cada mes: solo las consultamos
+    with metricas.etapa('datos') as medida:
+        data_elegir_mes = datos.cargar_densidades().curvas_meses(meses)
+        medida.filas = len(data_elegir_mes)
+    return densidades.figura_densidades(data_elegir_mes, 'Mes', "Distribución del precio por mes")
+
+
+def figura_ccaa(mes, ccaa):
+    # Igual, con las curvas precalculadas para cada par (Mes, Destino)
+    with metricas.etapa('datos') as medida:
+        data_elegir_ccaa = datos.cargar_densidades().curvas_destinos(mes, ccaa)
+        medida.filas = len(data_elegir_ccaa)
+    return densidades.figura_densidades(data_elegir_ccaa, 'Destino', f"Distribución del precio por CCAA para {mes}")
+
+
+def precargar():
+    datos.cargar_densidades()
+
+
+def variantes():
+    # Cada mes o CCAA por separado y todos a la vez, que es lo que más se pide
+    meses = [[mes] for mes in ingesta.MESES] + [list(ingesta.MESES)]
+    ccaa = [[destino] for destino in ingesta.CCAA] + [list(ingesta.CCAA)]
+    return ([('comparador_meses', 'plotly', figura_meses, {'meses': seleccion}) for seleccion in meses]
+            + [('comparador_ccaa', 'plotly', figura_ccaa, {'mes': mes, 'ccaa': seleccion})
+               for mes in ingesta.MESES for seleccion in ccaa])
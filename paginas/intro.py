@@ -0,0 +1,26 @@
+# -*- coding: utf-8 -*-
+
+import streamlit as st
+
+
+# Primera página: Introducción
+
+def set_intro():
+    st.header('Introducción')
+    
+    st.write("""En este Dashboard podrá encontrar gráficos e información de más en 50.000 alojamientos para 6 personas en toda España.
+             Estos datos han sido scrapeados de la web de airbnb (https://www.airbnb.es/).
+             Más concretamente podrá ajustar destino, fechas y rango de precios para encontrar su alojamiento ideal, además podrá visualizar gráficos como la variación el precio del alojamiento a lo largo del año, el precio medio por Comunidad Autónoma, mapas y mucho más.
+             Aproveche para decidir sus próximas vacaciones!""")
+    
+    # Añado una foto para hacer más bonito el dashboard
+    st.image('image_airbnb.jpg', caption='Imágen extraída de https://static.hosteltur.com/', width='stretch')
+
+
+def precargar():
+    # La introducción no necesita datos
+    pass
+
+
+def variantes():
+    return []
@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+
+import streamlit as st
+
+import datos
+import figuras
+import ingesta
+import mapas
+import metricas
+
+
+# Sexta página: Mapa
+
+def set_mapa():
+
+    st.header('Mapa')
+    
+    st.write('''Seleccione un mes y le mostraremos un mapa que representará el
+             precio medio del alojamiento en cada Comunidad Autónoma.''')
+    
+    mes_mapa = st.selectbox('Seleccione un mes', ['Febrero',
+                                                  'Marzo',
+                                                  'Abril',
+                                                  'Mayo',
+                                                  'Junio',
+                                                  'Julio',
+                                                  'Agosto',
+                                                  'Septiembre',
+                                                  'Octubre',
+                                                  'Noviembre',
+                                                  'Diciembre',
+                                                  'Enero'])
+    
+    tipo_mapa = st.radio('Tipo de mapa', ['Imagen', 'Interactivo'], horizontal=True)
+    
+    boton_mapa = st.button(f'Mostrar mapa para {mes_mapa}')
+        
+    if boton_mapa:
+    
+        if tipo_mapa == 'Imagen':
+            # Los doce mapas están prerenderizados por versión de los datos:
+            # aquí solo servimos los bytes del PNG
+            with metricas.etapa('datos') as medida:
+                imagen_mapa = mapas.mapa_mensual(mes_mapa)
+                medida.bytes = len(imagen_mapa)
+            with metricas.etapa('envio'):
+                st.image(imagen_mapa)
+        else:
+            # El choropleth interactivo lo dibuja el navegador; su JSON se guarda por mes
+            fig_mapa = figuras.plotly('mapa_interactivo', {'mes': mes_mapa},
+                                      lambda: figura_interactiva(mes_mapa))
+            with metricas.etapa('envio'):
+                st.plotly_chart(fig_mapa)
+
+
+def figura_interactiva(mes):
+    return mapas.figura_interactiva(datos.cargar_cubo(), mes)
+
+
+def precargar():
+    datos.cargar_cubo()
+    mapas.mapa_mensual('Febrero')
+
+
+def variantes():
+    # Los doce PNG ya los prerenderiza precargar()
+    return [('mapa_interactivo', 'plotly', figura_interactiva, {'mes': mes}) for mes in ingesta.MESES]
@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+
+import pandas as pd
+import streamlit as st
+
+import metricas
+
+
+# Página oculta (modo debug, ver paginas/__init__.py): tiempos por página y
+# etapa de este proceso
+
+def set_metricas():
+
+    st.header('Métricas')
+
+    st.write('''Duración de cada etapa del render en este proceso: p50, p95 y máximo de las
+             últimas ejecuciones, con las filas y bytes medios por llamada.''')
+
+    resumen = metricas.resumen()
+    if not resumen:
+        st.write('Aún no se ha medido ninguna página.')
+    else:
+        st.dataframe(pd.DataFrame(resumen).round(2), hide_index=True)
+
+    texto = metricas.exportar_prometheus()
+    st.download_button('Descargar en formato Prometheus', texto, file_name='metricas.prom', mime='text/plain')
+    with st.expander('Formato Prometheus'):
+        st.code(texto, language='text')
+
+    st.subheader('Perfiles')
+    st.write('''Añada ?perfil=1 a la URL de cualquier página para perfilar esa ejecución;
+             aquí se guardan los últimos perfiles.''')
+    for perfil in metricas.perfiles():
+        with st.expander(f"{perfil['hora']} · {perfil['pagina']} · {perfil['segundos'] * 1000:.0f} ms "
+                         f"({perfil['herramienta']})"):
+            st.code(perfil['texto'], language='text')
+
+
+def precargar():
+    # Solo lee contadores en memoria
+    pass
@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+
+import streamlit as st
+
+import datos
+import figuras
+import ingesta
+import metricas
+
+
+# Quinta página: Serie temporal
+
+def set_serie_temp():
+    
+    st.header('Serie temporal')
+    
+    st.write('''Introduzca varias Comunidades Autónomas y le mostraremos el precio medio
+             del alojamiento en cada mes del año para las Comunidades Autónomas seleccionadas,
+             así usted podrá comparar precios y elegir el mejor destino.''')
+    
+    ccaa_serie = st.multiselect('Seleccione las Comunidades Autónomas', ['Andalucía',
+                                                                         'Aragón',
+                                                                         'Asturias',
+                                                                         'Cantabria',
+                                                                         'Castilla-La Mancha',
+                                                                         'Castilla y León',
+                                                                         'Cataluña',
+                                                                         'Extremadura',
+                                                                         'Galicia',
+                                                                         'Islas Baleares',
+                                                                         'Canarias',
+                                                                         'La Rioja',
+                                                                         'Comunidad de Madrid',
+                                                                         'Región de Murcia',
+                                                                         'Navarra',
+                                                                         'País Vasco',
+                                                                         'Comunidad Valenciana'])
+    
+    boton_serie = st.button('Mostrar gráfico')
+        
+    if boton_serie and len(ccaa_serie) > 0:
+        # La imagen sale de la caché de figuras si alguien ya pidió esas CCAA
+        imagen_serie_temp = figuras.png('serie_temporal', {'ccaa': ccaa_serie}, lambda: figura_serie(ccaa_serie))
+        with metricas.etapa('envio') as medida:
+            st.image(imagen_serie_temp)
+            medida.bytes = len(imagen_serie_temp)
+
+
+def figura_serie(ccaa):
+    # plotnine es la importación más cara: solo la pagamos al dibujar
+    import plotnine as p9
+
+    with metricas.etapa('datos') as medida:
+        data_serie_temp = datos.cargar_cubo().precio_por_mes_y_destino(ccaa, 'mean')
+        medida.filas = len(data_serie_temp)
+
+    grafico_serie_temp = (p9.ggplot(data_serie_temp, p9.aes(x='Mes', y='precio_noche', color='Destino'))
+                          + p9.geom_line()
+                          + p9.aes(group='Destino')
+                          + p9.ggtitle('Precio medio de los alojamientos por mes.')
+                          + p9.scale_x_discrete(name="Meses",
+                                             limits=['Febrero',
+                                                     'Marzo',
+                                                     'Abril',
+                                                     'Mayo',
+                                                     'Junio',
+                                                     'Julio',
+                                                     'Agosto',
+                                                     'Septiembre',
+                                                     'Octubre',
+                                                     'Noviembre',
+                                                     'Diciembre',
+                                                     'Enero'])
+                          + p9.scale_y_continuous(name="Precio medio (€/noche)",
+                                               breaks=range(110,350,20),
+                                               labels=[str(x)+'€' for x in range(110,350,20)])
+                          + p9.theme(axis_text_x=p9.element_text(angle=45, hjust=1)))
+    return grafico_serie_temp.draw()
+
+
+def precargar():
+    datos.cargar_cubo()
+
+
+def variantes():
+    seleccion = [[destino] for destino in ingesta.CCAA] + [list(ingesta.CCAA)]
+    return [('serie_temporal', 'png', figura_serie, {'ccaa': ccaa}) for ccaa in seleccion]
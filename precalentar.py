@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+
+# Precalentado de todas las cachés al desplegar o tras añadir un lote de datos,
+# para que ningún usuario pague un camino en frío:
+#   1. en este proceso, precargar() de cada página: la ingesta si falta, el
+#      dataset y sus derivados (que quedan exportados en cache/compartido/), el
+#      GeoParquet de las comunidades y los doce mapas PNG
+#   2. en un pool de procesos, todas las figuras que devuelve variantes() de
+#      cada página (17 CCAA x 12 meses en el Buscador, cada mes y CCAA suelto y
+#      todos a la vez en los multiselects...), escritas en la capa en disco de
+#      la caché de figuras (cache/figuras/<versión>-<código>/), donde mira la app
+#      antes de construir una figura
+# Los procesos del pool mapean el dataset exportado en el paso 1 en lugar de
+# leerlo. Al final se informa del tiempo total y del de cada página. La app y
+# el precalentado tienen que compartir AIRBNB_CACHE (y AIRBNB_DATOS/AIRBNB_ALMACEN).
+#
+# Uso: python precalentar.py [--procesos 4] [--json]
+
+import argparse
+import concurrent.futures
+import json
+import logging
+import multiprocessing
+import os
+import time
+
+PROCESOS = os.cpu_count() or 1
+
+
+def _iniciar_proceso():
+    # Fuera de `streamlit run` las cachés avisan de que no hay runtime
+    logging.getLogger('streamlit').setLevel(logging.ERROR)
+
+
+def _precalentar_figura(tarea):
+    import figuras
+
+    pagina, grafico, formato, funcion, estado = tarea
+    inicio = time.perf_counter()
+    n_bytes = figuras.precalentar(grafico, estado, lambda: funcion(**estado), formato)
+    return pagina, n_bytes, time.perf_counter() - inicio
+
+
+def precalentar(procesos=PROCESOS):
+    _iniciar_proceso()
+    import datos
+    import figuras
+    import paginas
+
+    inicio = time.perf_counter()
+    resultados = {}
+    for nombre in paginas.PAGINAS:
+        inicio_pagina = time.perf_counter()
+        paginas.modulo(nombre).precargar()
+        resultados[nombre] = {'pagina': nombre, 'segundos_precarga': time.perf_counter() - inicio_pagina,
+                              'figuras': 0, 'escritas': 0, 'bytes': 0, 'segundos_figuras': 0.0}
+    segundos_precarga = time.perf_counter() - inicio
+
+    # Las figuras de versiones anteriores de los datos o del código ya no se van a pedir
+    version = datos.version_datos()
+    figuras.limpiar(version)
+
+    tareas = [(nombre, *variante) for nombre in paginas.PAGINAS for variante in paginas.modulo(nombre).variantes()]
+    inicio_figuras = time.perf_counter()
+    if tareas:
+        # spawn y no fork: el proceso padre ya tiene hilos de pyarrow y streamlit
+        with concurrent.futures.ProcessPoolExecutor(procesos, mp_context=multiprocessing.get_context('spawn'),
+                                                    initializer=_iniciar_proceso) as pool:
+            for pagina, n_bytes, segundos in pool.map(_precalentar_figura, tareas,
+                                                      chunksize=max(len(tareas) // (procesos * 4), 1)):
+                resultados[pagina]['figuras'] += 1
+                resultados[pagina]['escritas'] += n_bytes > 0
+                resultados[pagina]['bytes'] += n_bytes
+                resultados[pagina]['segundos_figuras'] += segundos
+
+    return {'version': version, 'procesos': procesos, 'paginas': list(resultados.values()),
+            'segundos_precarga': segundos_precarga,
+            'segundos_figuras': time.perf_counter() - inicio_figuras,
+            'segundos_total': time.perf_counter() - inicio}
+
+
+def imprimir(resultado):
+    print(f"Precalentado de la versión {resultado['version']} con {resultado['procesos']} procesos:")
+    print(f"  {'página':<24}{'precarga':>10}{'figuras':>9}{'nuevas':>8}{'MB':>8}{'s figuras':>11}")
+    for fila in resultado['paginas']:
+        print(f"  {fila['pagina']:<24}{fila['segundos_precarga']:10.3f}{fila['figuras']:9d}{fila['escritas']:8d}"
+              f"{fila['bytes'] / 2**20:8.1f}{fila['segundos_figuras']:11.3f}")
+    print(f"Precarga {resultado['segundos_precarga']:.2f} s, figuras {resultado['segundos_figuras']:.2f} s, "
+          f"total {resultado['segundos_total']:.2f} s")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Precalienta las cachés de datos, mapas y figuras')
+    parser.add_argument('--procesos', type=int, default=PROCESOS)
+    parser.add_argument('--json', action='store_true')
+    args = parser.parse_args()
+
+    # Las rutas de datos y cachés son relativas a la raíz del proyecto
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+    resultado = precalentar(args.procesos)
+    if args.json:
+        print(json.dumps(resultado, ensure_ascii=False))
+    else:
+        imprimir(resultado)
@@ -0,0 +1,21 @@
+# -*- coding: utf-8 -*-
+
+import os
+import sys
+
+import pytest
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+import ingesta  # noqa: E402
+
+
+@pytest.fixture(scope='session')
+def ruta_raw():
+    return os.path.join(RAIZ, ingesta.RUTA_RAW)
+
+
+@pytest.fixture(scope='session')
+def airbnb(ruta_raw):
+    return ingesta.parsear(ingesta.leer_raw(ruta_raw))
@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+
+import os
+
+import pandas as pd
+import pytest
+
+import almacen
+import ingesta
+
+# Filas de airbnb_raw.csv con precio, mes y destino, sin las repetidas enteras
+FILAS_CSV = 51565
+
+COLUMNAS = ['Mes', 'Destino'] + almacen.COLUMNAS
+
+
+def _ordenar(airbnb):
+    return airbnb[COLUMNAS].astype({'Mes': str, 'Destino': str}).sort_values(COLUMNAS).reset_index(drop=True)
+
+
+def test_ingesta_del_csv_real(airbnb):
+    assert len(airbnb) == FILAS_CSV
+
+
+@pytest.fixture
+def ruta_base(airbnb, tmp_path):
+    ruta = str(tmp_path / 'airbnb.parquet')
+    airbnb.to_parquet(ruta)
+    return ruta
+
+
+def _leer(ruta):
+    return almacen.leer(almacen.particiones(almacen.lotes(ruta), ruta))
+
+
+def test_el_almacen_da_las_mismas_filas_que_la_ingesta(airbnb, ruta_raw, ruta_base, tmp_path):
+    ruta = str(tmp_path / 'almacen')
+    almacen.anadir_lote(ruta_raw, '2024-03-01', ruta, ruta_base)
+    leido = _leer(ruta)
+
+    assert len(leido) == FILAS_CSV
+    pd.testing.assert_frame_equal(_ordenar(leido), _ordenar(airbnb))
+
+
+def test_un_primer_lote_parcial_conserva_el_resto(airbnb, ruta_raw, ruta_base, tmp_path):
+    raw = ingesta.leer_raw(ruta_raw)
+    parcial = raw[(raw['mes'] == 'JULIO') & (raw['destino'] == 'Galicia')].iloc[::2]
+    ruta_parcial = str(tmp_path / 'parcial.csv')
+    parcial.to_csv(ruta_parcial, sep=';', index=False)
+
+    ruta = str(tmp_path / 'almacen')
+    nuevas = almacen.anadir_lote(ruta_parcial, '2024-03-01', ruta, ruta_base)
+    assert almacen.lotes(ruta) == [almacen.LOTE_BASE, 'fecha=2024-03-01']
+
+    leido = _leer(ruta)
+    afectado = (airbnb['Mes'] == 'Julio') & (airbnb['Destino'] == 'Galicia')
+    esperado = pd.concat([airbnb.loc[~afectado], nuevas], ignore_index=True)
+    assert 0 < len(nuevas) < afectado.sum()
+    pd.testing.assert_frame_equal(_ordenar(leido), _ordenar(esperado))
+
+
+def test_un_temporal_de_un_lote_a_medias_no_bloquea(airbnb, ruta_raw, ruta_base, tmp_path):
+    ruta = tmp_path / 'almacen'
+    a_medias = ruta / f'fecha=2024-03-01.{os.getpid()}.tmp' / 'mes=Julio' / 'destino=Galicia'
+    a_medias.mkdir(parents=True)
+
+    almacen.anadir_lote(ruta_raw, '2024-03-01', str(ruta), ruta_base)
+    assert sorted(os.listdir(ruta)) == [almacen.LOTE_BASE, 'fecha=2024-03-01']
@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import compartido
+import cubo
+import densidades
+import indice
+
+
+@pytest.fixture
+def instantanea(airbnb, tmp_path, monkeypatch):
+    monkeypatch.setattr(compartido, 'RUTA_COMPARTIDO', str(tmp_path))
+    derivados = {'indice': indice.IndiceBuscador(airbnb), 'cubo': cubo.CuboPrecios(airbnb),
+                 'densidades': densidades.DensidadesPrecio(airbnb)}
+    compartido.exportar('prueba', derivados)
+    return derivados, compartido.mapear('prueba')
+
+
+def test_sin_pickle_y_con_formato_en_la_ruta(instantanea, tmp_path):
+    assert compartido.ruta_instantanea('prueba') == str(tmp_path / f'prueba-formato{compartido.FORMATO}')
+    assert not [nombre for nombre in (tmp_path / f'prueba-formato{compartido.FORMATO}').iterdir()
+                if nombre.suffix == '.pkl']
+
+
+def test_los_derivados_mapeados_coinciden(instantanea):
+    derivados, (airbnb, mapeados) = instantanea
+    for nombre in cubo.TABLAS:
+        pd.testing.assert_frame_equal(getattr(mapeados['cubo'], nombre), getattr(derivados['cubo'], nombre))
+    assert mapeados['cubo'].precio_del_mes('Julio').equals(derivados['cubo'].precio_del_mes('Julio'))
+
+    assert mapeados['densidades'].meses == derivados['densidades'].meses
+    assert mapeados['densidades'].destinos == derivados['densidades'].destinos
+    np.testing.assert_array_equal(mapeados['densidades'].por_mes_destino, derivados['densidades'].por_mes_destino)
+    pd.testing.assert_frame_equal(mapeados['densidades'].curvas_meses(['Julio', 'Agosto']),
+                                  derivados['densidades'].curvas_meses(['Julio', 'Agosto']))
+
+
+def test_las_densidades_mapeadas_se_actualizan_como_si_se_recalcularan(instantanea):
+    _, (airbnb, mapeados) = instantanea
+    afectado = (airbnb['Destino'] == 'Galicia') & (airbnb['Mes'] == 'Julio')
+    filas = airbnb.loc[afectado].iloc[::2]
+    actual = pd.concat([airbnb.loc[~afectado], filas], ignore_index=True)
+
+    mapeados['densidades'].actualizar(actual, filas, {('Galicia', 'Julio')})
+    completo = densidades.DensidadesPrecio(actual)
+    # Mismas filas por grupo en otro orden: solo cambia el redondeo de las sumas
+    np.testing.assert_allclose(mapeados['densidades'].por_mes, completo.por_mes, rtol=1e-5, atol=1e-9)
+    np.testing.assert_allclose(mapeados['densidades'].por_mes_destino, completo.por_mes_destino,
+                               rtol=1e-5, atol=1e-9)
+
+
+def _memmap(valores):
+    base = valores
+    while base is not None and not isinstance(base, np.memmap):
+        base = getattr(base, 'base', None)
+    return base
+
+
+def test_el_dataframe_mapeado_no_copia_las_columnas(instantanea):
+    derivados, (airbnb, _) = instantanea
+    for columna in airbnb.columns:
+        serie = airbnb[columna]
+        valores = serie.array.codes if isinstance(serie.dtype, pd.CategoricalDtype) else serie.to_numpy()
+        mapeo = _memmap(valores)
+        assert mapeo is not None, columna
+        assert np.shares_memory(valores, mapeo), columna
+    pd.testing.assert_series_equal(airbnb['precio_noche'], derivados['indice'].ordenado['precio_noche'])
+
+
+def test_los_temporales_de_exportaciones_muertas_no_bloquean(airbnb, tmp_path, monkeypatch):
+    monkeypatch.setattr(compartido, 'RUTA_COMPARTIDO', str(tmp_path))
+    # Restos de una exportación de este mismo pid (contenedor reiniciado) y de
+    # un proceso que ya no existe
+    propio = tmp_path / f'{compartido._nombre("prueba")}.{os.getpid()}.tmp'
+    propio.mkdir()
+    (propio / 'columna_0.npy').write_bytes(b'a medias')
+    terminado = subprocess.run([sys.executable, '-c', 'import os; print(os.getpid())'],
+                               capture_output=True, text=True, check=True)
+    muerto = tmp_path / f'otra-version.{terminado.stdout.strip()}.tmp'
+    muerto.mkdir()
+    en_curso = tmp_path / f'otra-version.{os.getppid()}.tmp'
+    en_curso.mkdir()
+
+    derivados = {'indice': indice.IndiceBuscador(airbnb), 'cubo': cubo.CuboPrecios(airbnb),
+                 'densidades': densidades.DensidadesPrecio(airbnb)}
+    compartido.exportar('prueba', derivados)
+
+    assert compartido.mapear('prueba') is not None
+    assert sorted(os.listdir(tmp_path)) == sorted([compartido._nombre('prueba'), en_curso.name])
@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+
+import numpy as np
+
+import densidades
+
+
+def _kde_referencia(precios):
+    # KDE gaussiano exacto sobre la rejilla con el ancho de banda nrd0 de R
+    q25, q75 = np.percentile(precios, [25, 75])
+    ancho = 0.9 * min(precios.std(ddof=1), (q75 - q25) / 1.34) * len(precios) ** -0.2
+    distancias = (densidades.REJILLA[:, None] - precios[None, :]) / ancho
+    return np.exp(-0.5 * distancias ** 2).sum(axis=1) / (len(precios) * ancho * np.sqrt(2 * np.pi))
+
+
+def test_kde_por_grupo_coincide_con_un_kde_exacto(airbnb):
+    mes = airbnb['Mes'].cat.codes.to_numpy().astype(np.int64)
+    destino = airbnb['Destino'].cat.codes.to_numpy().astype(np.int64)
+    precios = airbnb['precio_noche'].to_numpy(dtype=np.float64)
+    n_destinos = len(airbnb['Destino'].cat.categories)
+    codigos = mes * n_destinos + destino
+    curvas = densidades.kde_por_grupo(codigos, precios, 12 * n_destinos)
+
+    comprobados = 0
+    for codigo in np.unique(codigos):
+        del_grupo = precios[codigos == codigo]
+        if len(del_grupo) < 2:
+            continue
+        referencia = _kde_referencia(del_grupo)
+        # El binning lineal sobre la rejilla se desvía menos de un 0,5 % del máximo
+        assert np.abs(curvas[codigo] - referencia).max() / referencia.max() < 0.005, codigo
+        comprobados += 1
+    assert comprobados == 12 * n_destinos
+
+
+def test_sin_dos_precios_no_hay_curva():
+    curvas = densidades.kde_por_grupo(np.array([0, 1, 1]), np.array([100.0, 80.0, 120.0]), 3)
+    assert np.isnan(curvas[0]).all() and np.isnan(curvas[2]).all()
+    assert np.isfinite(curvas[1]).all()
@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+
+import os
+
+import figuras
+
+
+def test_el_codigo_forma_parte_de_la_ruta_y_limpiar_borra_el_viejo(tmp_path, monkeypatch):
+    monkeypatch.setattr(figuras, 'RUTA_FIGURAS', str(tmp_path))
+    clave = ('serie', 'datos-1', (('meses', ('Julio',)),))
+
+    monkeypatch.setattr(figuras, 'version_codigo', lambda: 'codigo-viejo')
+    vieja = figuras.ruta_figura(clave, 'plotly')
+    figuras._escribir(vieja, b'{}')
+
+    monkeypatch.setattr(figuras, 'version_codigo', lambda: 'codigo-nuevo')
+    nueva = figuras.ruta_figura(clave, 'plotly')
+    assert nueva != vieja
+    figuras._escribir(nueva, b'{}')
+
+    figuras.limpiar('datos-1')
+    assert os.listdir(tmp_path) == ['datos-1-codigo-nuevo']
+
+
+def test_la_version_del_codigo_es_estable():
+    assert figuras.version_codigo() == figuras.version_codigo.__wrapped__()
+
+
+class FiguraSimulada:
+
+    def __init__(self, texto):
+        self.texto = texto
+
+    def to_json(self):
+        return self.texto
+
+
+def test_la_app_lee_el_disco_pero_solo_escribe_el_precalentado(tmp_path, monkeypatch):
+    monkeypatch.setattr(figuras, 'RUTA_FIGURAS', str(tmp_path))
+    monkeypatch.setattr(figuras, 'TAMANO_MAXIMO', 2**20)
+    monkeypatch.setattr(figuras.datos, 'version_datos', lambda: 'datos-1')
+    monkeypatch.setattr(figuras, '_cache', lambda: figuras.CacheFiguras(2**20))
+
+    # Una combinación cualquiera de los widgets no deja nada en disco
+    assert figuras.plotly('serie', {'ccaa': ['Galicia', 'Asturias']},
+                          lambda: FiguraSimulada('{"al_vuelo": 1}')) == {'al_vuelo': 1}
+    assert not list(tmp_path.rglob('*.json'))
+
+    # Lo que escribe el precalentado sí se sirve desde disco
+    assert figuras.precalentar('serie', {'ccaa': ['Galicia']}, lambda: FiguraSimulada('{"precalentada": 1}'),
+                               'plotly') > 0
+    assert figuras.plotly('serie', {'ccaa': ['Galicia']},
+                          lambda: FiguraSimulada('{"al_vuelo": 1}')) == {'precalentada': 1}
+    assert len(list(tmp_path.rglob('*.json'))) == 1
@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+
+import numpy as np
+import pandas as pd
+
+import indice
+
+
+def _lote(airbnb):
+    # Galicia/Julio con la mitad de las filas y Canarias/Enero con precios nuevos
+    galicia = airbnb.loc[(airbnb['Destino'] == 'Galicia') & (airbnb['Mes'] == 'Julio')].iloc[::2]
+    canarias = airbnb.loc[(airbnb['Destino'] == 'Canarias') & (airbnb['Mes'] == 'Enero')].copy()
+    canarias['precio_noche'] = canarias['precio_noche'] * 1.1
+    filas = pd.concat([galicia, canarias], ignore_index=True)
+    return filas, {('Galicia', 'Julio'), ('Canarias', 'Enero')}
+
+
+def test_actualizar_equivale_a_reconstruir(airbnb):
+    filas, claves = _lote(airbnb)
+    afectados = pd.Series(list(zip(airbnb['Destino'], airbnb['Mes']))).isin(claves).to_numpy()
+    actual = pd.concat([airbnb.loc[~afectados], filas], ignore_index=True)
+
+    incremental = indice.IndiceBuscador(airbnb)
+    incremental.actualizar(actual, filas, claves)
+    completo = indice.IndiceBuscador(actual)
+
+    pd.testing.assert_frame_equal(incremental.ordenado, completo.ordenado)
+    for nombre in ['inicios', 'fines', 'orden', 'precios']:
+        np.testing.assert_array_equal(getattr(incremental, nombre), getattr(completo, nombre))
+    assert incremental.tramos.keys() == completo.tramos.keys()
+    pd.testing.assert_frame_equal(incremental.top('Galicia', 'Julio', 50, 150),
+                                  completo.top('Galicia', 'Julio', 50, 150))
+
+
+def _buscar(airbnb, destino, mes, precio_min, precio_max, k=20):
+    # La consulta que hacía el Buscador antes de tener índice
+    return airbnb.loc[(airbnb['Destino'] == destino) & (airbnb['Mes'] == mes) &
+                      (airbnb['precio_noche'] <= precio_max) &
+                      (airbnb['precio_noche'] >= precio_min)].sort_values(by=['Valoración', 'Nº Reseñas'],
+                                                                          ascending=False).head(k)
+
+
+def _comparar(indice_buscador, airbnb, destino, mes, precio_min, precio_max):
+    obtenido = indice_buscador.top(destino, mes, precio_min, precio_max).reset_index(drop=True)
+    esperado = _buscar(airbnb, destino, mes, precio_min, precio_max).reset_index(drop=True)
+    pd.testing.assert_frame_equal(obtenido, esperado)
+    return len(esperado)
+
+
+def test_top_coincide_con_el_filtro_original(airbnb):
+    indice_buscador = indice.IndiceBuscador(airbnb)
+    encontrados = []
+    for destino in ['Andalucía', 'Galicia', 'La Rioja', 'Canarias']:
+        for mes in ['Julio', 'Enero']:
+            for precio_min, precio_max in [(200.0, 500.0), (0.0, 1500.0), (80.0, 80.0), (1400.0, 1450.0)]:
+                encontrados.append(_comparar(indice_buscador, airbnb, destino, mes, precio_min, precio_max))
+    # Hay rangos con más de 20 candidatos, con menos y vacíos
+    assert max(encontrados) == 20 and 0 in encontrados and any(0 < n < 20 for n in encontrados)
+
+
+def test_top_con_empates_y_sin_valoracion():
+    # Empates en valoración y reseñas (gana el orden original), alojamientos sin
+    # valoración (al final) y un par (Destino, Mes) sin filas
+    airbnb = pd.DataFrame({
+        'Mes': pd.Categorical(['Julio'] * 8 + ['Agosto'], categories=['Julio', 'Agosto'], ordered=True),
+        'Destino': pd.Categorical(['Galicia'] * 9, categories=['Galicia', 'Asturias']),
+        'Alojamiento': [f'Casa {i}' for i in range(9)],
+        'precio_noche': np.array([100, 90, 100, 120, 80, 100, 95, 100, 100], dtype=np.float32),
+        'Descuento': np.zeros(9, dtype=np.float32),
+        'Valoración': np.array([4.5, 4.9, 4.5, np.nan, 4.5, np.nan, 4.9, 4.5, 5.0], dtype=np.float32),
+        'Nº Reseñas': np.array([10, 3, 10, 0, 12, 0, 3, 10, 1], dtype=np.int32),
+    })
+    indice_buscador = indice.IndiceBuscador(airbnb)
+    for precio_min, precio_max, k in [(0.0, 1500.0, 20), (0.0, 1500.0, 4), (100.0, 100.0, 20), (101.0, 119.0, 20)]:
+        obtenido = indice_buscador.top('Galicia', 'Julio', precio_min, precio_max, k).reset_index(drop=True)
+        esperado = _buscar(airbnb, 'Galicia', 'Julio', precio_min, precio_max, k).reset_index(drop=True)
+        pd.testing.assert_frame_equal(obtenido, esperado)
+    assert list(indice_buscador.top('Galicia', 'Julio', 0.0, 1500.0)['Alojamiento']) == [
+        'Casa 1', 'Casa 6', 'Casa 4', 'Casa 0', 'Casa 2', 'Casa 7', 'Casa 3', 'Casa 5']
+    assert indice_buscador.top('Asturias', 'Julio', 0.0, 1500.0).empty
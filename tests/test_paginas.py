@@ -0,0 +1,16 @@
+# -*- coding: utf-8 -*-
+
+import paginas
+
+
+def test_el_modo_debug_lo_habilita_el_servidor(monkeypatch):
+    monkeypatch.setattr(paginas, 'DEBUG_PERMITIDO', False)
+    assert not paginas.debug({'debug': '1'})
+    assert not paginas.perfilar({'debug': '1', 'perfil': '1'})
+
+    monkeypatch.setattr(paginas, 'DEBUG_PERMITIDO', True)
+    assert paginas.debug({'debug': '1'})
+    assert not paginas.debug({'debug': '0'})
+    assert not paginas.perfilar({'perfil': '1'})
+    assert not paginas.perfilar({'debug': '1', 'perfil': '0'})
+    assert paginas.perfilar({'debug': '1', 'perfil': '1'})